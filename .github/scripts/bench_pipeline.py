@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asset pipeline stage by stage and compare the timings against a stored baseline.
+
+Stages timed (each over the whole ROM / charset):
+    rom_load, decode_sprite, decode_tile, pixels_to_slot_mask, png_encode,
+    simulate_tile_usage, pixels_to_polygons, glyph_from_polygons, build_font
+
+By default the run uses synthetic ROM dumps drawn from a seeded RNG, so it needs no
+copyrighted data and times the same work on every machine; pass --real-roms to use
+rom_sprites.bin / rom_tiles.bin next to this file instead. Glyph stages trace the tile
+sheet of the same ROM, like build_assets.py does.
+
+Runners differ in speed, so every stage is also reported relative to a fixed
+calibration workload, and the regression check compares those ratios: a stage is
+flagged when its ratio exceeds the baseline's by more than --tolerance (and by more
+than --noise-floor seconds, so sub-millisecond stages do not flap). The calibration
+loop does not track fontTools- or NumPy-bound stages across machines, so
+bench_baseline.json is informational: flagged stages are printed as warnings, and
+only --strict turns them into a failing exit status (for comparisons on one machine).
+
+--against REV is the reliable check: it extracts the pipeline of git revision REV into
+a temporary directory and times it with this harness on the same machine, alternating
+the two over --rounds rounds, then compares the fastest times directly. CI gates on
+the parent commit this way.
+
+Usage:
+    python bench_pipeline.py                    # run, print a table, compare with bench_baseline.json
+    python bench_pipeline.py --strict           # exit non-zero on regressions
+    python bench_pipeline.py --against HEAD^ --strict  # compare with the parent commit on this machine
+    python bench_pipeline.py --output report.json
+    python bench_pipeline.py --update-baseline  # accept the current timings as the new baseline
+
+Requirements:
+    pip install fonttools pillow numpy
+"""
+
+import argparse
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import gen_fonts
+import gen_sprites
+
+CURRENT_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = CURRENT_DIR / "bench_baseline.json"
+REPORT_VERSION = 1
+DEFAULT_REPEAT = 5
+DEFAULT_SEED = 0
+DEFAULT_TOLERANCE = 0.5    # allowed slowdown of a stage relative to the baseline (0.5 = +50%)
+DEFAULT_NOISE_FLOOR = 0.002  # seconds; smaller absolute slowdowns are never reported
+DEFAULT_ROUNDS = 3
+
+# (name, setup, run): setup prepares inputs outside the timed region, run is the timed body
+Stage = Tuple[str, Callable[[], None], Callable[[], None]]
+
+
+def write_synthetic_roms(directory: Path, seed: int) -> Tuple[Path, Path]:
+    """Write random sprite and tile ROM dumps of the real sizes into directory."""
+    rng = np.random.default_rng(seed)
+    sprites_path = directory / gen_sprites.ROM_SPRITES_PATH.name
+    tiles_path = directory / gen_sprites.ROM_TILES_PATH.name
+    sprites_path.write_bytes(rng.integers(0, 256, gen_sprites.ROM_SPRITES_SIZE, dtype=np.uint8).tobytes())
+    tiles_path.write_bytes(rng.integers(0, 256, gen_sprites.ROM_TILES_SIZE, dtype=np.uint8).tobytes())
+    return sprites_path, tiles_path
+
+
+def calibrate() -> float:
+    """Time a fixed mix of interpreter and NumPy work used to normalise stage timings across machines."""
+    data = np.arange(1 << 16, dtype=np.uint32)
+    start = time.perf_counter()
+    total = 0
+    for value in range(200_000):
+        total += value & 0xFF
+    for _ in range(20):
+        data = (data * 2654435761) >> 3
+    return time.perf_counter() - start
+
+
+def build_stages(sprites_path: Path, tiles_path: Path, work_dir: Path, charset: str) -> List[Stage]:
+    layout = gen_sprites.load_map_layout(gen_sprites.CONFIG_PATH)
+    font_path = work_dir / "bench.ttf"
+    upem, dilate = 1024, 1
+    state: Dict[str, object] = {"rom": gen_sprites.RomSet.load(sprites_path, tiles_path)}
+
+    def nothing() -> None:
+        pass
+
+    def fresh_rom() -> None:
+        rom = state["rom"]
+        state["rom"] = gen_sprites.RomSet(rom.rom_sprites, rom.rom_tiles)
+
+    def rom_load() -> None:
+        state["rom"] = gen_sprites.RomSet.load(sprites_path, tiles_path)
+
+    def decode_sprites() -> None:
+        for idx in range(gen_sprites.ROM_SPRITES_SIZE // gen_sprites.SPRITE_STRIDE):
+            state["rom"].decode_sprite(idx)
+
+    def decode_tiles() -> None:
+        for idx in range(gen_sprites.ROM_TILES_SIZE // gen_sprites.TILE_STRIDE):
+            state["rom"].decode_tile(idx)
+
+    def slot_mask_inputs() -> None:
+        images = list(state["rom"].sprite_sheet()) + list(state["rom"].tile_sheet())
+        state["slot_masks"] = [(pixels, gen_sprites.used_slot_values(pixels)) for pixels in images]
+
+    def slot_masks() -> None:
+        state["masks"] = [
+            gen_sprites.pixels_to_slot_mask(pixels, slot, scale=gen_sprites.SCALE_FACTOR)
+            for pixels, slots in state["slot_masks"]
+            for slot in slots
+        ]
+
+    def png_encode() -> None:
+        for mask in state["masks"]:
+            gen_sprites.encode_png(mask)
+
+    def tile_usage() -> None:
+        gen_sprites.simulate_tile_usage(layout)
+
+    def glyph_bitmaps() -> None:
+        tile_pixels = state["rom"].tile_sheet()
+        state["bitmaps"] = [
+            gen_fonts._bitmap_from_tile(gen_fonts._conv_char(ch), tile_pixels, dilate)
+            for ch in dict.fromkeys(charset)
+        ]
+
+    def pixels_to_polygons() -> None:
+        state["polygons"] = [
+            (width, height, gen_fonts._pixels_to_polygons(width, height, pixels))
+            for width, height, pixels in state["bitmaps"]
+        ]
+
+    def glyph_from_polygons() -> None:
+        for width, height, polygons in state["polygons"]:
+            gen_fonts._glyph_from_polygons(width, height, polygons, upem)
+
+    def build_font() -> None:
+        gen_fonts.build_font(
+            charset, font_path, "Bench", "Regular", upem, dilate, tile_pixels=state["rom"].tile_sheet()
+        )
+
+    return [
+        ("rom_load", nothing, rom_load),
+        ("decode_sprite", fresh_rom, decode_sprites),
+        ("decode_tile", fresh_rom, decode_tiles),
+        ("pixels_to_slot_mask", slot_mask_inputs, slot_masks),
+        ("png_encode", nothing, png_encode),
+        ("simulate_tile_usage", nothing, tile_usage),
+        ("pixels_to_polygons", glyph_bitmaps, pixels_to_polygons),
+        ("glyph_from_polygons", nothing, glyph_from_polygons),
+        ("build_font", nothing, build_font),
+    ]
+
+
+def time_stage(setup: Callable[[], None], run: Callable[[], None], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_benchmarks(
+    repeat: int,
+    seed: int,
+    real_roms: bool,
+    charset: str,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, object]:
+    calibration = min(calibrate() for _ in range(repeat))
+    stages: Dict[str, Dict[str, object]] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        work_dir = Path(tmp)
+        if real_roms:
+            sprites_path, tiles_path = gen_sprites.ROM_SPRITES_PATH, gen_sprites.ROM_TILES_PATH
+        else:
+            sprites_path, tiles_path = write_synthetic_roms(work_dir, seed)
+
+        # Later stages consume what earlier ones produced, so skipped stages still run untimed
+        for name, setup, run in build_stages(sprites_path, tiles_path, work_dir, charset):
+            if only and name not in only:
+                setup()
+                run()
+                continue
+            samples = time_stage(setup, run, repeat)
+            best = min(samples)
+            stages[name] = {
+                "min": best,
+                "median": statistics.median(samples),
+                "runs": len(samples),
+                "relative": best / calibration,
+            }
+
+    return {
+        "version": REPORT_VERSION,
+        "rom": "real" if real_roms else f"synthetic:{seed}",
+        "charset": charset,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration": calibration,
+        "stages": stages,
+    }
+
+
+def compare_with_baseline(
+    report: Dict[str, object],
+    baseline: Dict[str, object],
+    tolerance: float,
+    noise_floor: float,
+) -> List[str]:
+    """Return one message per stage whose calibrated time regressed past tolerance."""
+    regressions = []
+    base_stages = baseline.get("stages", {})
+    for name, result in report["stages"].items():
+        base = base_stages.get(name)
+        if not base:
+            continue
+        limit = base["relative"] * (1 + tolerance)
+        expected = base["relative"] * report["calibration"]
+        if result["relative"] > limit and result["min"] - expected > noise_floor:
+            regressions.append(
+                f"{name}: {result['relative']:.2f}x calibration, baseline {base['relative']:.2f}x "
+                f"(limit {limit:.2f}x)"
+            )
+    return regressions
+
+
+def export_revision(rev: str, directory: Path) -> Path:
+    """Extract the tree of git revision rev into directory and return its copy of this script's directory."""
+    repo_root = gen_sprites.ASSET_DIR.parent
+    try:
+        archive = subprocess.run(
+            ["git", "archive", "--format=tar", rev], cwd=repo_root, check=True, capture_output=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as exc:
+        detail = exc.stderr.decode(errors="replace").strip() if isinstance(exc, subprocess.CalledProcessError) else exc
+        raise SystemExit(f"Cannot export revision {rev!r}: {detail}")
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory, filter="data")
+    return directory / CURRENT_DIR.relative_to(repo_root)
+
+
+def run_isolated(script_dir: Path, args: Sequence[str], output: Path) -> Optional[Dict[str, object]]:
+    """Run this harness against the pipeline modules in script_dir in a fresh interpreter."""
+    script = script_dir / Path(__file__).name
+    if script.resolve() != Path(__file__).resolve():
+        shutil.copyfile(__file__, script)
+    command = [sys.executable, str(script), *args, "--output", str(output), "--baseline", str(output.with_suffix(".none"))]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return None
+    return json.loads(output.read_text(encoding="utf-8"))
+
+
+def merge_rounds(reports: Sequence[Dict[str, object]]) -> Dict[str, object]:
+    """Fold the reports of several rounds into one, keeping each stage's fastest run."""
+    merged = dict(reports[0])
+    merged["calibration"] = min(report["calibration"] for report in reports)
+    merged["stages"] = {}
+    for name in reports[0]["stages"]:
+        results = [report["stages"][name] for report in reports]
+        best = min(result["min"] for result in results)
+        merged["stages"][name] = {
+            "min": best,
+            "median": statistics.median(result["median"] for result in results),
+            "runs": sum(result["runs"] for result in results),
+            "relative": best / merged["calibration"],
+        }
+    return merged
+
+
+def run_against(
+    rev: str,
+    rounds: int,
+    args: Sequence[str],
+) -> Tuple[Dict[str, object], Optional[Dict[str, object]]]:
+    """
+    Time this tree and revision rev alternately for rounds rounds on this machine.
+    Returns the merged reports of both; the second is None when the harness cannot
+    drive rev's pipeline (for example before bench_pipeline.py or an API it uses existed).
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_against_") as tmp:
+        work_dir = Path(tmp)
+        reference_dir = export_revision(rev, work_dir / "tree")
+        sides: Dict[Path, List[Dict[str, object]]] = {CURRENT_DIR: []}
+        if (reference_dir / "gen_sprites.py").exists():
+            sides[reference_dir] = []
+            for rom_path in (gen_sprites.ROM_SPRITES_PATH, gen_sprites.ROM_TILES_PATH):
+                if rom_path.exists():
+                    shutil.copyfile(rom_path, reference_dir / rom_path.name)
+        else:
+            print(f"Warning: {rev} has no asset pipeline; skipping the comparison.", file=sys.stderr)
+
+        for index in range(rounds):
+            # Alternate which side runs first so slow drift on the runner hits both equally
+            order = list(sides) if index % 2 == 0 else list(sides)[::-1]
+            for script_dir in order:
+                if script_dir not in sides:
+                    continue
+                report = run_isolated(script_dir, args, work_dir / f"round{index}.json")
+                if report is not None:
+                    sides[script_dir].append(report)
+                elif script_dir == CURRENT_DIR:
+                    raise SystemExit("Benchmark of the working tree failed.")
+                else:
+                    print(f"Warning: this harness cannot drive {rev}; skipping the comparison.", file=sys.stderr)
+                    del sides[script_dir]
+
+    current = merge_rounds(sides.pop(CURRENT_DIR))
+    if not sides:
+        return current, None
+    reference = merge_rounds(sides.popitem()[1])
+    reference["rev"] = rev
+    return current, reference
+
+
+def compare_with_reference(
+    report: Dict[str, object],
+    reference: Dict[str, object],
+    tolerance: float,
+    noise_floor: float,
+) -> List[str]:
+    """Return one message per stage that is slower than the same-machine reference run past tolerance."""
+    regressions = []
+    for name, result in report["stages"].items():
+        base = reference["stages"].get(name)
+        if not base:
+            continue
+        limit = base["min"] * (1 + tolerance)
+        if result["min"] > limit and result["min"] - base["min"] > noise_floor:
+            regressions.append(
+                f"{name}: {result['min'] * 1000:.2f} ms, {reference['rev']} {base['min'] * 1000:.2f} ms "
+                f"(limit {limit * 1000:.2f} ms)"
+            )
+    return regressions
+
+
+def format_table(report: Dict[str, object], baseline: Optional[Dict[str, object]]) -> str:
+    base_stages = (baseline or {}).get("stages", {})
+    lines = [f"{'stage':<22}{'min ms':>10}{'median ms':>12}{'relative':>10}{'baseline':>10}"]
+    for name, result in report["stages"].items():
+        base = base_stages.get(name)
+        base_text = f"{base['relative']:.2f}" if base else "-"
+        lines.append(
+            f"{name:<22}{result['min'] * 1000:>10.2f}{result['median'] * 1000:>12.2f}"
+            f"{result['relative']:>10.2f}{base_text:>10}"
+        )
+    lines.append(f"calibration: {report['calibration'] * 1000:.2f} ms")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark gen_sprites.py and gen_fonts.py stage by stage.")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Timed runs per stage; the fastest one is compared (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help="Seed of the synthetic ROM generator (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--real-roms",
+        action="store_true",
+        help="Benchmark rom_sprites.bin / rom_tiles.bin instead of synthetic dumps.",
+    )
+    parser.add_argument(
+        "--charset",
+        default=gen_fonts.DEFAULT_CHARSET,
+        help="Characters used by the glyph stages (default: %(default)r).",
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        dest="stages",
+        help="Only time this stage; may be repeated.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="Baseline report to compare against (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results to --baseline instead of comparing.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed relative slowdown per stage (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--noise-floor",
+        type=float,
+        default=DEFAULT_NOISE_FLOOR,
+        help="Ignore slowdowns smaller than this many seconds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--against",
+        metavar="REV",
+        help="Compare with git revision REV benchmarked on this machine instead of with --baseline.",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        help="Alternating runs of each tree with --against (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit with an error when a stage regressed instead of only printing a warning.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Also write the JSON report to this path ('-' for stdout).",
+    )
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1.")
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1.")
+    if args.against and args.update_baseline:
+        parser.error("--against and --update-baseline cannot be combined.")
+
+    reference = None
+    if args.against:
+        forwarded = ["--repeat", str(args.repeat), "--seed", str(args.seed), "--charset", args.charset]
+        forwarded += ["--real-roms"] if args.real_roms else []
+        for stage in args.stages or ():
+            forwarded += ["--stage", stage]
+        report, reference = run_against(args.against, args.rounds, forwarded)
+        report["reference"] = reference
+    else:
+        report = run_benchmarks(args.repeat, args.seed, args.real_roms, args.charset, args.stages)
+    report_json = json.dumps(report, indent=2)
+    if args.output == Path("-"):
+        print(report_json)
+    elif args.output:
+        args.output.write_text(report_json + "\n", encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.write_text(report_json + "\n", encoding="utf-8")
+        print(format_table(report, None), file=sys.stderr)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return
+
+    if args.against:
+        print(format_table(report, reference), file=sys.stderr)
+        if reference is None:
+            return
+        regressions = compare_with_reference(report, reference, args.tolerance, args.noise_floor)
+        target = args.against
+    else:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+        print(format_table(report, baseline), file=sys.stderr)
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --update-baseline to create one.", file=sys.stderr)
+            return
+        if baseline.get("rom") != report["rom"] or baseline.get("charset") != report["charset"]:
+            raise SystemExit(f"Baseline {args.baseline} was recorded with different inputs; refusing to compare.")
+        regressions = compare_with_baseline(report, baseline, args.tolerance, args.noise_floor)
+        target = "the baseline"
+
+    if regressions:
+        message = "Performance regressions:\n  " + "\n  ".join(regressions)
+        if args.strict:
+            raise SystemExit(message)
+        print(f"Warning: {message}", file=sys.stderr)
+        return
+    print(f"No regressions against {target}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Build every generated asset in one process: sprite layers, tile layers, the baked
+maze background, the optional atlas, animation strips and colored actor sprites, and
+the TTF font.
+
+The pipeline is a small dependency graph of stages with declared inputs and outputs:
+
+    rom ──> sprites ────┐
+     ├───> tiles ───────┼──> atlas
+     ├───> background ──┘
+     ├───> strips
+     ├───> actors
+     └───> fonts
+
+Each stage's key hashes its input files, every script in .github/scripts, the settings it
+reads and the keys of the stages it depends on. A stage whose key matches the manifest in
+.cache/ and whose recorded outputs are unchanged on disk is skipped; otherwise it re-runs
+and the files it no longer produces are deleted. With --jobs N independent stages run in
+parallel worker processes.
+
+Usage:
+    python build_assets.py                 # everything except the atlas, strips and actors
+    python build_assets.py fonts           # just the font (and what it depends on)
+    python build_assets.py --atlas --jobs 0    # main.lua loads the atlas once assets.sprites in config.dl is assets/sprites_atlas.dl
+    python build_assets.py strips          # animation strips and strips.dl, see gen_sprites.export_strips
+    python build_assets.py actors          # colored actor sprites and actors.dl, see gen_sprites.export_actors
+
+The font holds only the characters the game prints (see gen_fonts.scan_charset), so a
+new message in the Lua sources or .dl assets changes the fonts stage key and adds its glyphs.
+
+--size-report prints what each assets/ directory adds to main.zip, and --budget fails the
+build when those sizes exceed the limits in asset_budget.json ({"total": bytes,
+"directories": {name: bytes}}, in estimated zip bytes).
+
+gen_sprites.py and gen_fonts.py keep working on their own; use gen_sprites.py directly
+for --dedupe and --rom-dir batches.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import gen_fonts
+import gen_sprites
+import pipeline_metrics
+from pipeline_metrics import metrics
+
+CURRENT_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = CURRENT_DIR / ".cache" / "build_assets_manifest.json"
+FONT_OUTPUT_PATH = gen_sprites.ASSET_DIR / "fonts" / "pacman.ttf"
+BUDGET_PATH = CURRENT_DIR / "asset_budget.json"
+ZIP_ENTRY_OVERHEAD = 30 + 46  # local file header plus central directory record, excluding the name twice
+
+
+class BuildOptions(NamedTuple):
+    """Settings shared by every stage; each stage hashes only the fields it lists."""
+
+    sprites_path: str = str(gen_sprites.ROM_SPRITES_PATH)
+    tiles_path: str = str(gen_sprites.ROM_TILES_PATH)
+    mask_mode: str = gen_sprites.MASK_MODE
+    png_profile: str = gen_sprites.PNG_PROFILE
+    tile_usage: str = "config"
+    atlas_max_size: int = gen_sprites.ATLAS_MAX_SIZE
+    charset: str = gen_fonts.DEFAULT_CHARSET
+    family: str = "Pacman Tiles"
+    style: str = "Regular"
+    upem: int = 1024
+    dilate: int = 1
+    strikes: Tuple[int, ...] = ()
+    glyph_atlas: bool = False
+
+
+@lru_cache(maxsize=None)
+def load_rom(sprites_path: str, tiles_path: str) -> gen_sprites.RomSet:
+    """One decoded RomSet per process, shared by every stage that runs there."""
+    return gen_sprites.RomSet.load(Path(sprites_path), Path(tiles_path))
+
+
+def run_rom(options: BuildOptions) -> Dict[str, str]:
+    load_rom(options.sprites_path, options.tiles_path)
+    return {}
+
+
+def run_sprites(options: BuildOptions) -> Dict[str, str]:
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    gen_sprites.export_sprites(load_rom(options.sprites_path, options.tiles_path), writer, mode=options.mask_mode)
+    return writer.digests
+
+
+def run_tiles(options: BuildOptions) -> Dict[str, str]:
+    layout = gen_sprites.load_map_layout(gen_sprites.CONFIG_PATH)
+    if options.tile_usage == "simulate":
+        tile_slots: Dict[int, Optional[Set[int]]] = {tile: None for tile in gen_sprites.simulate_tile_usage(layout)}
+    else:
+        tile_slots = gen_sprites.config_tile_plan(layout, gen_sprites.SPRITE_LIST_PATH)
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    rom = load_rom(options.sprites_path, options.tiles_path)
+    gen_sprites.export_tiles(rom, tile_slots, writer, mode=options.mask_mode)
+    return writer.digests
+
+
+def run_background(options: BuildOptions) -> Dict[str, str]:
+    layout = gen_sprites.load_map_layout(gen_sprites.CONFIG_PATH)
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    gen_sprites.export_background(load_rom(options.sprites_path, options.tiles_path), writer, layout)
+    return writer.digests
+
+
+def run_atlas(options: BuildOptions, layer_names: Sequence[str]) -> Dict[str, str]:
+    from PIL import Image
+
+    layers = {}
+    for name in layer_names:
+        with Image.open(gen_sprites.ASSET_DIR / name) as img:
+            img.load()
+            layers[name] = gen_sprites.full_depth_image(img)
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    gen_sprites.export_atlas(
+        layers,
+        writer,
+        gen_sprites.SPRITE_LIST_PATH,
+        gen_sprites.ASSET_DIR / gen_sprites.ATLAS_LIST_PATH.name,
+        max_size=options.atlas_max_size,
+    )
+    return writer.digests
+
+
+def run_strips(options: BuildOptions) -> Dict[str, str]:
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    gen_sprites.export_strips(
+        load_rom(options.sprites_path, options.tiles_path),
+        writer,
+        gen_sprites.SPRITE_LIST_PATH,
+        gen_sprites.PROFILES_PATH,
+        gen_sprites.ASSET_DIR / gen_sprites.STRIP_LIST_PATH.name,
+        mode=options.mask_mode,
+    )
+    return writer.digests
+
+
+def run_actors(options: BuildOptions) -> Dict[str, str]:
+    writer = gen_sprites.OutputWriter(gen_sprites.ASSET_DIR, options.png_profile)
+    gen_sprites.export_actors(
+        load_rom(options.sprites_path, options.tiles_path),
+        writer,
+        gen_sprites.SPRITE_LIST_PATH,
+        gen_sprites.PROFILES_PATH,
+        gen_sprites.ASSET_DIR / gen_sprites.ACTOR_LIST_PATH.name,
+    )
+    return writer.digests
+
+
+def run_fonts(options: BuildOptions) -> Dict[str, str]:
+    tile_pixels = load_rom(options.sprites_path, options.tiles_path).tile_sheet()
+    written = gen_fonts.build_font(
+        options.charset,
+        FONT_OUTPUT_PATH,
+        options.family,
+        options.style,
+        options.upem,
+        options.dilate,
+        tile_pixels,
+        outline_cache=gen_fonts.OutlineCache(),
+        strikes=options.strikes,
+        glyph_atlas=gen_fonts.GLYPH_ATLAS_LIST_PATH if options.glyph_atlas else None,
+    )
+    return {
+        path.relative_to(gen_sprites.ASSET_DIR).as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in written
+    }
+
+
+# outputs, wall and CPU seconds, and the metrics report of a stage run in a worker
+StageResult = Tuple[Dict[str, str], float, float, Optional[Dict[str, object]]]
+
+
+def execute(name: str, *args: object, isolated: bool = False) -> StageResult:
+    """
+    Run stage name and return its outputs with wall and CPU seconds. isolated
+    marks a worker process: its metrics start empty and their report (counters,
+    glyph records, inner stages) is returned for the parent to merge.
+    """
+    if isolated:
+        metrics.reset()
+    wall, cpu = time.perf_counter(), time.process_time()
+    outputs = STAGES[name].run(*args)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return outputs, wall, cpu, metrics.report() if isolated else None
+
+
+class Stage(NamedTuple):
+    name: str
+    deps: Tuple[str, ...]
+    inputs: Tuple[Path, ...]   # data files whose contents the outputs depend on (scripts are always hashed)
+    settings: Tuple[str, ...]  # BuildOptions fields the outputs depend on
+    run: Callable[..., Dict[str, str]]
+
+
+STAGES: Dict[str, Stage] = {
+    stage.name: stage
+    for stage in (
+        Stage("rom", (), (), ("sprites_path", "tiles_path"), run_rom),
+        Stage("sprites", ("rom",), (), ("mask_mode", "png_profile"), run_sprites),
+        Stage(
+            "tiles",
+            ("rom",),
+            (gen_sprites.CONFIG_PATH, gen_sprites.SPRITE_LIST_PATH),
+            ("mask_mode", "tile_usage", "png_profile"),
+            run_tiles,
+        ),
+        Stage("background", ("rom",), (gen_sprites.CONFIG_PATH,), ("png_profile",), run_background),
+        Stage(
+            "atlas",
+            ("sprites", "tiles", "background"),
+            (gen_sprites.SPRITE_LIST_PATH,),
+            ("atlas_max_size", "png_profile"),
+            run_atlas,
+        ),
+        Stage(
+            "strips",
+            ("rom",),
+            (gen_sprites.SPRITE_LIST_PATH, gen_sprites.PROFILES_PATH),
+            ("mask_mode", "png_profile"),
+            run_strips,
+        ),
+        Stage(
+            "actors",
+            ("rom",),
+            (gen_sprites.SPRITE_LIST_PATH, gen_sprites.PROFILES_PATH),
+            ("png_profile",),
+            run_actors,
+        ),
+        Stage(
+            "fonts",
+            ("rom",),
+            (),
+            ("charset", "family", "style", "upem", "dilate", "strikes", "glyph_atlas"),
+            run_fonts,
+        ),
+    )
+}
+DEFAULT_TARGETS = ("sprites", "tiles", "background", "fonts")
+
+
+def resolve_targets(targets: Sequence[str]) -> List[str]:
+    """Return the targets and everything they depend on, dependencies first."""
+    order: List[str] = []
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        for dep in STAGES[name].deps:
+            visit(dep)
+        order.append(name)
+
+    for target in targets:
+        visit(target)
+    return order
+
+
+def stage_key(stage: Stage, options: BuildOptions, dep_keys: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    rom_inputs = (Path(options.sprites_path), Path(options.tiles_path)) if stage.name == "rom" else ()
+    for path in stage.inputs + rom_inputs + tuple(gen_sprites.script_sources()):
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    settings = {field: getattr(options, field) for field in stage.settings}
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for dep in stage.deps:
+        digest.update(dep_keys[dep].encode("ascii"))
+    return digest.hexdigest()
+
+
+def remove_stale(previous: Dict[str, object], outputs: Dict[str, str]) -> int:
+    removed = 0
+    old_outputs = previous.get("outputs")
+    if isinstance(old_outputs, dict):
+        for name in old_outputs.keys() - outputs.keys():
+            stale = gen_sprites.ASSET_DIR / name
+            if stale.exists():
+                stale.unlink()
+                removed += 1
+    return removed
+
+
+def run_pipeline(
+    targets: Sequence[str],
+    options: BuildOptions,
+    manifest_path: Path = MANIFEST_PATH,
+    force: bool = False,
+    pool: Optional[Executor] = None,
+) -> Dict[str, str]:
+    """
+    Run the stages needed for targets, skipping up-to-date ones, and return
+    {stage: "built" | "fresh"}. With pool, stages whose dependencies are done
+    are submitted together; without it they run one after another.
+    """
+    order = resolve_targets(targets)
+    manifest = gen_sprites.load_manifest(manifest_path)
+    keys: Dict[str, str] = {}
+    status: Dict[str, str] = {}
+    pending: Dict[Future, str] = {}
+
+    def finish(name: str, result: StageResult) -> None:
+        outputs, wall, cpu, report = result
+        metrics.add_stage(name, wall, cpu)
+        if report is not None:
+            metrics.merge(report)
+        previous = manifest.get(name, {})
+        removed = remove_stale(previous if isinstance(previous, dict) else {}, outputs)
+        manifest[name] = {"key": keys[name], "outputs": dict(sorted(outputs.items()))}
+        status[name] = "built"
+        print(f"{name}: built {len(outputs)} files" + (f", removed {removed} stale" if removed else ""))
+
+    def ready() -> List[str]:
+        return [
+            name
+            for name in order
+            if name not in status
+            and name not in pending.values()
+            and all(status.get(dep) for dep in STAGES[name].deps)
+        ]
+
+    while len(status) < len(order):
+        for name in ready():
+            stage = STAGES[name]
+            keys[name] = stage_key(stage, options, keys)
+            entry = manifest.get(name, {})
+            if not force and isinstance(entry, dict) and gen_sprites.manifest_is_fresh(
+                entry, keys[name], gen_sprites.ASSET_DIR
+            ):
+                status[name] = "fresh"
+                print(f"{name}: up to date")
+                continue
+            args: Tuple = (options,)
+            if name == "atlas":
+                args += (sorted(layer for dep in stage.deps for layer in manifest[dep]["outputs"]),)
+            if pool is None:
+                finish(name, execute(name, *args))
+            else:
+                pending[pool.submit(execute, name, *args, isolated=True)] = name
+        if pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(pending.pop(future), future.result())
+
+    manifest_path.parent.mkdir(exist_ok=True, parents=True)
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return status
+
+
+def asset_sizes(root: Path = gen_sprites.ASSET_DIR) -> Dict[str, Tuple[int, int, int]]:
+    """
+    Return {group: (files, bytes, zip bytes)} for root, grouped by top-level
+    directory ("." for loose files). Zip bytes estimate what `zip -r main.zip assets`
+    adds: the deflated (or stored, when smaller) data plus the per-entry headers.
+    """
+    sizes: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(root)
+        data = path.read_bytes()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        deflated = len(compressor.compress(data) + compressor.flush())
+        name = f"{root.name}/{relative.as_posix()}"
+        entry = sizes[relative.parts[0] if len(relative.parts) > 1 else "."]
+        entry[0] += 1
+        entry[1] += len(data)
+        entry[2] += min(deflated, len(data)) + ZIP_ENTRY_OVERHEAD + 2 * len(name.encode("utf-8"))
+    return {group: (files, size, zipped) for group, (files, size, zipped) in sorted(sizes.items())}
+
+
+def size_report(sizes: Dict[str, Tuple[int, int, int]], budget: Optional[Dict[str, object]] = None) -> List[str]:
+    """Format asset_sizes() as a table, with each group's zip-byte budget when one is given."""
+    limits = budget.get("directories", {}) if budget else {}
+    lines = [f"{'assets/':<16}{'files':>7}{'bytes':>11}{'zip bytes':>11}{'budget':>11}"]
+    for group, (files, size, zipped) in [*sizes.items(), ("total", tuple(map(sum, zip(*sizes.values()))))]:
+        limit = budget.get("total") if budget and group == "total" else limits.get(group)
+        lines.append(f"{group:<16}{files:>7}{size:>11}{zipped:>11}{'' if limit is None else limit:>11}")
+    return lines
+
+
+def over_budget(sizes: Dict[str, Tuple[int, int, int]], budget: Dict[str, object]) -> List[str]:
+    """Return a message for every directory (and the total) whose zip bytes exceed budget."""
+    problems = []
+    checks = dict(budget.get("directories", {}))
+    if "total" in budget:
+        checks["total"] = budget["total"]
+    totals = {**{group: entry[2] for group, entry in sizes.items()}, "total": sum(entry[2] for entry in sizes.values())}
+    for group, limit in sorted(checks.items()):
+        if totals.get(group, 0) > limit:
+            problems.append(f"{group}: {totals[group]} zip bytes, budget {limit}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build sprites, tiles, background, atlas and font as one pipeline.")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="target",
+        help=f"Stages to build with their dependencies: {', '.join(STAGES)} or all "
+        "(default: everything except atlas, strips and actors).",
+    )
+    parser.add_argument("--atlas", action="store_true", help="Also build the atlas target.")
+    parser.add_argument(
+        "--atlas-max-size",
+        type=int,
+        default=gen_sprites.ATLAS_MAX_SIZE,
+        help="Largest atlas sheet edge in pixels, a power of two (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--mask-mode",
+        choices=sorted(gen_sprites.MASK_CHANNELS),
+        default=gen_sprites.MASK_MODE,
+        help="Image mode of the layer masks (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--png-profile",
+        choices=list(gen_sprites.PNG_PROFILES),
+        default=gen_sprites.PNG_PROFILE,
+        help="PNG encoding of every image, see gen_sprites.py (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--tile-usage",
+        choices=("config", "simulate"),
+        default="config",
+        help="Tile selection, see gen_sprites.py --tile-usage (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--charset",
+        help="Font characters (default: the characters the game prints, scanned from the Lua sources "
+        "and .dl assets like gen_fonts.py --charset-from-sources).",
+    )
+    parser.add_argument(
+        "--dilate",
+        type=int,
+        default=1,
+        help="Odd glyph dilation kernel size, see gen_fonts.py (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--strikes",
+        default="",
+        metavar="SIZES",
+        help="Embedded bitmap strike sizes of the font, see gen_fonts.py (e.g. tile,32).",
+    )
+    parser.add_argument(
+        "--glyph-atlas",
+        action="store_true",
+        help="Also write the HUD glyph atlas and glyphs.dl with the font, see gen_fonts.py.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for independent stages; 0 uses every CPU (default: %(default)d).",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-run every selected stage.")
+    parser.add_argument(
+        "--size-report",
+        action="store_true",
+        help="Print files, bytes and estimated main.zip bytes per assets/ directory afterwards.",
+    )
+    parser.add_argument(
+        "--budget",
+        nargs="?",
+        const=BUDGET_PATH,
+        type=Path,
+        metavar="PATH",
+        help=f"Fail when the assets/ zip bytes exceed the JSON budget at PATH (default PATH: {BUDGET_PATH.name}).",
+    )
+    pipeline_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    if args.atlas_max_size != gen_sprites._next_pow2(args.atlas_max_size):
+        raise SystemExit("--atlas-max-size must be a power of two.")
+
+    try:
+        strikes = tuple(gen_fonts.parse_strike_sizes(args.strikes))
+    except ValueError as exc:
+        parser.error(f"--strikes: {exc}")
+
+    charset = args.charset
+    if charset is None:
+        charset, notes = gen_fonts.scan_charset()
+        for note in notes:
+            logging.warning("%s; pass --charset to cover it", note)
+
+    unknown = set(args.targets) - set(STAGES) - {"all"}
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+    targets = list(args.targets or DEFAULT_TARGETS)
+    if "all" in targets:
+        targets = [name for name in targets if name != "all"] + list(STAGES)
+    if args.atlas and "atlas" not in targets:
+        targets.append("atlas")
+    options = BuildOptions(
+        mask_mode=args.mask_mode,
+        png_profile=args.png_profile,
+        tile_usage=args.tile_usage,
+        atlas_max_size=args.atlas_max_size,
+        charset=charset,
+        dilate=max(1, args.dilate if args.dilate % 2 == 1 else args.dilate + 1),
+        strikes=strikes,
+        glyph_atlas=args.glyph_atlas,
+    )
+
+    gen_sprites.check_sprite_entry(gen_sprites.SPRITE_LIST_PATH, gen_sprites.BACKGROUND_SPRITE_ENTRY)
+    runtime_list = gen_sprites.runtime_sprite_list(gen_sprites.CONFIG_PATH)
+    if runtime_list == gen_sprites.DEDUP_LIST_PATH:
+        raise SystemExit(f"main.lua loads {runtime_list.name}; build it with gen_sprites.py --dedupe instead.")
+    if runtime_list == gen_sprites.ATLAS_LIST_PATH and "atlas" not in targets:
+        targets.append("atlas")  # main.lua loads the atlas list, so it must be built
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with pipeline_metrics.instrumented(args):
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                run_pipeline(targets, options, force=args.force, pool=pool)
+        else:
+            run_pipeline(targets, options, force=args.force)
+        if args.size_report or args.budget:
+            with metrics.stage("size_report"):
+                sizes = asset_sizes()
+            budget = json.loads(args.budget.read_text(encoding="utf-8")) if args.budget else None
+            print("\n".join(size_report(sizes, budget)))
+            problems = over_budget(sizes, budget) if budget else []
+            if problems:
+                raise SystemExit("Asset budget exceeded:\n  " + "\n  ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
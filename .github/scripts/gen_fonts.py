@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 """
-Generate a simple monochrome TrueType font from the Pac-Man tile PNGs.
+Generate a simple monochrome TrueType font from the Pac-Man tiles.
 
 The script mirrors the `conv_char` lookup used in src/main.lua so the same
 character set can be rendered either as sprites or via Soluna's text system.
 
 Requirements:
-    pip install fonttools pillow
+    pip install fonttools pillow numpy
 
 Usage example:
     python font_from_tiles.py --charset 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-/"! ' \
@@ -14,25 +14,82 @@ Usage example:
 
 By default only the HUD string characters are generated.  Use --charset to add
 more characters or --charset-file to read them from a text file.
+--charset-from-sources builds the minimal set instead: every literal `text`
+field in the Lua sources and .dl assets plus the score digits; text fields set
+from other expressions and characters without a text tile are reported.
+
+Glyph bitmaps are decoded straight from the tile ROM through gen_sprites, so the
+font does not depend on the tile PNGs being exported (or kept) first.  Pass
+--tiles-from png to trace the exported tile_XX_layer3/1.png files instead.
+
+Pass --timings for per-stage times and per-glyph contour/point totals,
+--timings-json PATH for a JSON report, or --profile to run under cProfile.
+
+Traced outlines are cached in .cache/glyph_outlines.json next to this script,
+keyed by each glyph's bitmap and the --dilate / simplification settings, so only
+new or changed characters are traced again (--no-outline-cache to disable).
+
+--variants PATH builds several fonts (e.g. dilate levels for bold styles, other
+upem or strikes) in one run from a JSON list of specs; glyphs are decoded once,
+each distinct outline is traced once, across --jobs worker processes, and every
+variant is assembled from the shared outlines.
+
+--strikes tile,32 also embeds exact 1-bit bitmap strikes (EBDT/EBLC) at those
+pixel sizes, so rasterizers that honour embedded bitmaps (FreeType, DirectWrite,
+Core Text) draw the tiles pixel-perfect without scan-converting the outlines.
+Outlines stay in the font for every other size and for outline-only
+rasterizers such as stb_truetype; --bitmap-only drops them.
+
+--glyph-atlas packs the same tile pixels into ../../assets/fonts/glyphs_N.png and
+writes ../../assets/glyphs.dl, a sprites.dl-style list of glyph_uniXXXX rects, so
+a fixed one-tile-per-character HUD can draw text as sprites without importing
+the TTF or rasterizing strings at runtime.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import logging
+import os
+import re
 from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
 
-from fontTools.fontBuilder import FontBuilder
-from fontTools.pens.ttGlyphPen import TTGlyphPen
-from PIL import Image, ImageFilter
+import gen_sprites
+import pipeline_metrics
+from pipeline_metrics import metrics
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 TILES_DIR = ROOT_DIR.parent / "assets" / "tiles"
+# Written by gen_sprites.py --dedupe: {alias path: canonical path}, relative to assets/
+ALIASES_PATH = TILES_DIR.parent / "sprite_aliases.json"
 DEFAULT_CHARSET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!"
+# characters the tile ROM has text art for, i.e. those _conv_char maps on purpose
+TEXT_GLYPHS = frozenset(
+    gen_sprites.DEFAULT_TEXT_CHARACTERS + gen_sprites.DEFAULT_TEXT_DIGITS + (" ", "/", "-", '"', "!")
+)
 FALLBACK_TILE_SIZE = (16, 16)
+OUTLINE_CACHE_PATH = ROOT_DIR / "scripts" / ".cache" / "glyph_outlines.json"
+OUTLINE_CACHE_VERSION = 1  # file format; tracer changes are caught by hashing this script into every key
+# Where --charset-from-sources looks for printed strings: the game's Lua sources and .dl assets,
+# minus the engine submodule and these build scripts
+TEXT_SOURCE_ROOT = ROOT_DIR.parent
+TEXT_SOURCE_SKIP = ("soluna", ".github")
+# `text = <expr>` fields of the tables passed to commands.texts (drawn by gameplay/text.lua)
+LUA_TEXT_FIELD = re.compile(r"""\btext\s*=\s*(?:"((?:[^"\\\n]|\\.)*)"|'((?:[^'\\\n]|\\.)*)'|([^,}\n]+))""")
+DL_TEXT_FIELD = re.compile(r"^\s*text\s*:\s*(\S.*)$", re.MULTILINE)
+LUA_ESCAPES = {"n": "\n", "t": "\t"}
+GLYPH_ATLAS_LIST_PATH = gen_sprites.ASSET_DIR / "glyphs.dl"
+STRIKE_MAX_PPEM = 127  # EBLC line metrics store the ascender as a signed byte
 
 
 def _conv_char(c: str) -> str:
@@ -50,110 +107,266 @@ def _conv_char(c: str) -> str:
     return f"{ord(c):02X}"
 
 
-def _tile_path(code: str) -> Path:
-    return TILES_DIR / f"tile_{code}_layer3.png"
+@lru_cache(maxsize=None)
+def _tile_aliases(aliases_path: Path) -> Dict[str, str]:
+    if not aliases_path.exists():
+        return {}
+    return json.loads(aliases_path.read_text(encoding="utf-8"))
+
+
+def _tile_file(filename: str, tiles_dir: Path = TILES_DIR, aliases_path: Path = ALIASES_PATH) -> Path:
+    """Return the tile PNG for filename, following the dedupe alias table when it was not written."""
+    path = tiles_dir / filename
+    if not path.exists():
+        alias = _tile_aliases(aliases_path).get(f"{tiles_dir.name}/{filename}")
+        if alias:
+            path = tiles_dir.parent / alias
+    return path
+
+
+# width, height and (height, width) boolean occupancy grid of one glyph bitmap
+Bitmap = Tuple[int, int, np.ndarray]
 
 
-def _load_bitmap(code: str, dilate: int) -> Tuple[int, int, List[Tuple[int, int]]]:
-    path = _tile_path(code)
+def _png_mask(code: str, tiles_dir: Path = TILES_DIR, aliases_path: Path = ALIASES_PATH) -> Optional[np.ndarray]:
+    """Occupancy grid of the exported layer3 (else layer1) tile PNG in tiles_dir, or None when neither exists."""
+    path = _tile_file(f"tile_{code}_layer3.png", tiles_dir, aliases_path)
     if not path.exists():
-        fallback = TILES_DIR / f"tile_{code}_layer1.png"
+        fallback = _tile_file(f"tile_{code}_layer1.png", tiles_dir, aliases_path)
         if fallback.exists():
             path = fallback
-    if path.exists():
-        img = Image.open(path).convert("L")
-        if dilate > 1:
-            size = dilate if dilate % 2 == 1 else dilate + 1
-            img = img.filter(ImageFilter.MaxFilter(size=size))
-        width, height = img.size
-        on_pixels = [
-            (x, y)
-            for y in range(height)
-            for x in range(width)
-            if img.getpixel((x, y)) > 0
-        ]
-        if not on_pixels:
-            logging.warning("Glyph %s is empty", path.name)
-        return width, height, on_pixels
-
-    logging.warning("Tile image tile_%s_layer[13].png is missing, using blank glyph", code)
-    width, height = FALLBACK_TILE_SIZE
-    return width, height, []
+    if not path.exists():
+        logging.warning("Tile image tile_%s_layer[13].png is missing, using blank glyph", code)
+        return None
 
+    from PIL import Image
 
-Point = Tuple[int, int]
-Edge = Tuple[int, int, int, int]
+    mask = np.asarray(Image.open(path).convert("L")) > 0
+    if not mask.any():
+        logging.warning("Glyph %s is empty", path.name)
+    return mask
 
 
-def _pixels_to_polygons(width: int, height: int, pixels: Sequence[Point]) -> List[List[Point]]:
-    if not pixels:
-        return []
+def _tile_mask(code: str, tile_pixels: np.ndarray, scale: int = gen_sprites.SCALE_FACTOR) -> Optional[np.ndarray]:
+    """
+    Occupancy grid of the decoded tile, matching what _png_mask reads from the
+    exported PNGs: slot 3 (layer3), else slot 1, upscaled by scale (the PNGs
+    use gen_sprites.SCALE_FACTOR). None when the tile has neither slot.
+    """
+    pixels = tile_pixels[int(code, 16)]
+    slot = 3 if np.any(pixels == 3) else 1
+    mask = pixels == slot
+    if not mask.any():
+        logging.warning("Tile %s has no slot 1 or 3 pixels, using blank glyph", code)
+        return None
+    return mask.repeat(scale, axis=0).repeat(scale, axis=1)
 
-    filled = [[0] * width for _ in range(height)]
-    for x, y in pixels:
-        if 0 <= x < width and 0 <= y < height:
-            filled[y][x] = 1
 
-    edges: set[Edge] = set()
+def _dilate_mask(mask: np.ndarray, size: int) -> np.ndarray:
+    """Binary equivalent of ImageFilter.MaxFilter(size): OR over a size x size window."""
+    radius = size // 2
+    height, width = mask.shape
+    padded = np.pad(mask, radius)
+    out = np.zeros_like(mask)
+    for dy in range(size):
+        for dx in range(size):
+            out |= padded[dy:dy + height, dx:dx + width]
+    return out
 
-    def add_edge(sx: int, sy: int, ex: int, ey: int) -> None:
-        key = (sx, sy, ex, ey)
-        rev = (ex, ey, sx, sy)
-        if rev in edges:
-            edges.remove(rev)
-        elif key in edges:
-            edges.remove(key)
-        else:
-            edges.add(key)
 
-    for y in range(height):
-        for x in range(width):
-            if not filled[y][x]:
-                continue
-            add_edge(x, y, x + 1, y)
-            add_edge(x + 1, y, x + 1, y + 1)
-            add_edge(x + 1, y + 1, x, y + 1)
-            add_edge(x, y + 1, x, y)
+def _finish_bitmap(mask: Optional[np.ndarray], dilate: int, outline: int = 0) -> Bitmap:
+    """
+    Dilate mask by the odd kernel size dilate; with outline, keep only a ring that many
+    pixels wide around the result (a hollow outline style). A missing mask becomes a
+    blank FALLBACK_TILE_SIZE glyph.
+    """
+    if mask is None:
+        width, height = FALLBACK_TILE_SIZE
+        return width, height, np.zeros((height, width), dtype=bool)
+    if dilate > 1:
+        mask = _dilate_mask(mask, dilate if dilate % 2 == 1 else dilate + 1)
+    if outline > 0:
+        mask = _dilate_mask(mask, 2 * outline + 1) & ~mask
+    height, width = mask.shape
+    return width, height, mask
+
 
-    if not edges:
+def _load_bitmap(code: str, dilate: int, tiles_dir: Path = TILES_DIR, aliases_path: Path = ALIASES_PATH) -> Bitmap:
+    return _finish_bitmap(_png_mask(code, tiles_dir, aliases_path), dilate)
+
+
+def _bitmap_from_tile(
+    code: str, tile_pixels: np.ndarray, dilate: int, scale: int = gen_sprites.SCALE_FACTOR
+) -> Bitmap:
+    return _finish_bitmap(_tile_mask(code, tile_pixels, scale), dilate)
+
+
+Point = Tuple[int, int]
+
+
+def _boundary_runs(kind: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split every row of kind (-1/0/+1 per unit edge) into maximal runs of equal
+    non-zero values; return the row, start and end offset of each run.
+    """
+    rows, cols = kind.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = kind
+    changed = padded[:, 1:] != padded[:, :-1]
+    run_rows, starts = np.nonzero(changed & (padded[:, 1:] != 0))
+    _, ends = np.nonzero(changed & (padded[:, :-1] != 0))
+    return run_rows, starts, ends
+
+
+def _pixels_to_polygons(
+    width: int, height: int, pixels: Union[np.ndarray, Sequence[Point]]
+) -> List[List[Point]]:
+    """
+    Trace the outlines of the filled pixels (a (height, width) boolean grid or a
+    list of (x, y) points) as closed polygons, first point repeated at the end.
+
+    Boundary edges are found per scanline with NumPy and merged into maximal
+    runs, so a polygon has one vertex per corner and the Python work grows with
+    the number of corners rather than pixels. Edges keep the filled side on
+    their right in y-down coordinates (outlines clockwise on screen, holes
+    counter-clockwise). Where two pixels touch only diagonally the walk turns
+    right, so they stay separate contours.
+    """
+    if isinstance(pixels, np.ndarray) and pixels.ndim == 2:
+        filled = np.zeros((height, width), dtype=np.int8)
+        filled[: pixels.shape[0], : pixels.shape[1]] = pixels[:height, :width] != 0
+    else:
+        filled = np.zeros((height, width), dtype=np.int8)
+        points = np.array(pixels, dtype=np.int64).reshape(-1, 2)
+        inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+        filled[points[inside, 1], points[inside, 0]] = 1
+    if not filled.any():
         return []
 
-    adjacency: defaultdict[Point, set[Point]] = defaultdict(set)
-    for sx, sy, ex, ey in edges:
-        adjacency[(sx, sy)].add((ex, ey))
+    # Horizontal edges on line y: +1 where the pixel below is filled (runs east),
+    # -1 where the pixel above is (runs west). Vertical edges on line x: +1 where
+    # the pixel to the left is filled (runs south), -1 where the right one is (north).
+    padded = np.pad(filled, 1)
+    horizontal = padded[1:, 1:-1] - padded[:-1, 1:-1]
+    vertical = (padded[1:-1, :-1] - padded[1:-1, 1:]).T
+
+    segments: List[Tuple[Point, Point]] = []
+    for line, start, end in zip(*_boundary_runs(horizontal)):
+        y = int(line)
+        if horizontal[line, start] > 0:
+            segments.append(((int(start), y), (int(end), y)))
+        else:
+            segments.append(((int(end), y), (int(start), y)))
+    for line, start, end in zip(*_boundary_runs(vertical)):
+        x = int(line)
+        if vertical[line, start] > 0:
+            segments.append(((x, int(start)), (x, int(end))))
+        else:
+            segments.append(((x, int(end)), (x, int(start))))
 
-    def remove_edge(start: Point, end: Point) -> None:
-        key = (start[0], start[1], end[0], end[1])
-        if key in edges:
-            edges.remove(key)
-        neighbors = adjacency.get(start)
-        if neighbors:
-            neighbors.discard(end)
-            if not neighbors:
-                adjacency.pop(start, None)
+    outgoing: Dict[Point, List[int]] = defaultdict(list)
+    for index, (start, _) in enumerate(segments):
+        outgoing[start].append(index)
 
+    used = [False] * len(segments)
     polygons: List[List[Point]] = []
-    while edges:
-        sx, sy, ex, ey = next(iter(edges))
-        start = (sx, sy)
-        current = (ex, ey)
-        polygon: List[Point] = [start]
-        remove_edge(start, current)
+    for first in range(len(segments)):
+        if used[first]:
+            continue
+        used[first] = True
+        start, current = segments[first]
+        previous = start
+        polygon = [start]
         while True:
             polygon.append(current)
             if current == start:
                 break
-            neighbors = adjacency.get(current)
-            if not neighbors:
+            candidates = [index for index in outgoing[current] if not used[index]]
+            if not candidates:
                 break
-            next_point = next(iter(neighbors))
-            remove_edge(current, next_point)
-            current = next_point
+            index = candidates[0]
+            if len(candidates) > 1:
+                # Saddle: take the right turn, the direction (-dy, dx) of the incoming edge.
+                dx = (current[0] > previous[0]) - (current[0] < previous[0])
+                dy = (current[1] > previous[1]) - (current[1] < previous[1])
+                for candidate in candidates:
+                    nx, ny = segments[candidate][1]
+                    if ((nx > current[0]) - (nx < current[0]), (ny > current[1]) - (ny < current[1])) == (-dy, dx):
+                        index = candidate
+                        break
+            used[index] = True
+            previous, current = current, segments[index][1]
         if len(polygon) >= 4 and polygon[0] == polygon[-1]:
             polygons.append(polygon)
     return polygons
 
 
+def _outline_length(polygons: Sequence[Sequence[Point]]) -> int:
+    """Number of unit pixel edges along rectilinear outlines, i.e. points at one vertex per pixel edge."""
+    return sum(
+        abs(x2 - x1) + abs(y2 - y1)
+        for polygon in polygons
+        for (x1, y1), (x2, y2) in zip(polygon, polygon[1:])
+    )
+
+
+def _drop_redundant_points(polygon: Sequence[Point]) -> List[Point]:
+    """Remove repeated and collinear vertices (including spikes) from a closed polygon."""
+    points = [pt for i, pt in enumerate(polygon[:-1]) if pt != polygon[i - 1] or i == 0]
+    if len(points) > 1 and points[-1] == points[0]:
+        points.pop()
+    changed = True
+    while changed and len(points) >= 3:
+        changed = False
+        kept: List[Point] = []
+        n = len(points)
+        for i in range(n):
+            (x0, y0), (x1, y1) = kept[-1] if kept else points[i - 1], points[i]
+            x2, y2 = points[(i + 1) % n]
+            if (x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1) == 0:
+                changed = True
+                continue
+            kept.append(points[i])
+        points = kept
+    if len(points) < 3:
+        return []
+    return points + [points[0]]
+
+
+def _merge_touching(polygons: List[List[Point]]) -> List[List[Point]]:
+    """
+    Splice contours of the same winding that share a vertex into one contour
+    running through that vertex twice; the fill is unchanged and the glyph
+    needs one contour (endPtsOfContours entry) less per merge.
+    """
+    merged: List[Optional[List[Point]]] = [polygon[:-1] for polygon in polygons]
+    signs = [_signed_area(points) > 0 for points in merged]
+    owner: Dict[Point, int] = {}
+    for index, points in enumerate(merged):
+        for position, vertex in enumerate(points):
+            other = owner.get(vertex)
+            if other is None or signs[other] != signs[index]:
+                continue
+            target = merged[other]
+            at = target.index(vertex)
+            rotated = points[position:] + points[:position]
+            merged[other] = target[: at + 1] + rotated[1:] + [vertex] + target[at + 1:]
+            merged[index] = None
+            for pt in rotated:
+                owner.setdefault(pt, other)
+            break
+        else:
+            for vertex in points:
+                owner.setdefault(vertex, index)
+    return [points + [points[0]] for points in merged if points is not None]
+
+
+def _simplify_polygons(polygons: Sequence[Sequence[Point]]) -> List[List[Point]]:
+    """Drop duplicate and collinear points, then merge contours that touch at a vertex."""
+    cleaned = [points for points in map(_drop_redundant_points, polygons) if points]
+    return _merge_touching(cleaned)
+
+
 def _signed_area(points: Sequence[Point]) -> float:
     area = 0.0
     n = len(points)
@@ -181,6 +394,8 @@ def _signed_area_float(points: Sequence[Tuple[float, float]]) -> float:
 def _glyph_from_polygons(
     width: int, height: int, polygons: Sequence[Sequence[Point]], upem: int
 ):
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
     pen = TTGlyphPen(None)
     scale = upem / height if height else 1.0
     any_contour = False
@@ -212,6 +427,258 @@ def _glyph_from_polygons(
     return glyph
 
 
+def _text_sources(root: Path, pattern: str) -> List[Path]:
+    return sorted(
+        path for path in root.rglob(pattern) if path.relative_to(root).parts[0] not in TEXT_SOURCE_SKIP
+    )
+
+
+def scan_charset(root: Path = TEXT_SOURCE_ROOT) -> Tuple[str, List[str]]:
+    """
+    Collect the characters the game prints: literal `text = "..."` fields in the Lua
+    sources (the commands.texts payloads), `text : "..."` values in the .dl assets,
+    and the digits, which tostring() scores can produce at any time. Returns the
+    sorted charset and a note for every text field whose value is not a literal.
+    """
+    chars = set(gen_sprites.DEFAULT_TEXT_DIGITS)
+    notes: List[str] = []
+    for path in _text_sources(root, "*.lua"):
+        text = path.read_text(encoding="utf-8")
+        for match in LUA_TEXT_FIELD.finditer(text):
+            literal = match.group(1) if match.group(1) is not None else match.group(2)
+            if literal is not None:
+                chars.update(re.sub(r"\\(.)", lambda m: LUA_ESCAPES.get(m.group(1), m.group(1)), literal))
+            elif not match.group(3).strip().startswith("tostring("):
+                line = text.count("\n", 0, match.start()) + 1
+                notes.append(f"{path.relative_to(root)}:{line}: text = {match.group(3).strip()} is not a literal")
+    for path in _text_sources(root, "*.dl"):
+        for match in DL_TEXT_FIELD.finditer(path.read_text(encoding="utf-8")):
+            chars.update(str(gen_sprites._datalist_scalar(match.group(1).strip())))
+    chars.discard("\n")
+    return "".join(sorted(chars)), notes
+
+
+def parse_strike_sizes(text: str, config_path: Path = gen_sprites.CONFIG_PATH) -> List[int]:
+    """
+    Parse a --strikes list such as "tile,32,48": comma-separated ppem sizes, where
+    `tile` stands for cfg.display.tile in config.dl (the size gameplay/text.lua renders at).
+    """
+    sizes = set()
+    for token in filter(None, (part.strip() for part in text.split(","))):
+        if token == "tile":
+            cfg = gen_sprites.read_datalist(config_path)
+            sizes.add(int(cfg["display"]["tile"]))
+        elif token.isdigit():
+            sizes.add(int(token))
+        else:
+            raise ValueError(f"strike size must be a number or `tile`, got {token!r}")
+    bad = [size for size in sizes if not 1 <= size <= STRIKE_MAX_PPEM]
+    if bad:
+        raise ValueError(f"strike sizes must be between 1 and {STRIKE_MAX_PPEM} ppem, got {bad}")
+    return sorted(sizes)
+
+
+def _strike_bitmap(mask: Optional[np.ndarray], ppem: int) -> np.ndarray:
+    """Nearest-neighbour resample of an undilated glyph mask to ppem rows, keeping its aspect ratio."""
+    if mask is None:
+        width, height = FALLBACK_TILE_SIZE
+        return np.zeros((ppem, max(1, round(width * ppem / height))), dtype=bool)
+    height, width = mask.shape
+    out_width = max(1, round(width * ppem / height))
+    rows = np.arange(ppem) * height // ppem
+    cols = np.arange(out_width) * width // out_width
+    return mask[np.ix_(rows, cols)]
+
+
+def _setup_bitmap_strikes(font, strikes: Dict[int, Dict[str, np.ndarray]]) -> None:
+    """
+    Add EBDT/EBLC tables to font holding one 1-bit strike per ppem in strikes
+    ({ppem: {glyph name: bitmap}}). Bitmaps sit on the baseline like the outlines
+    (ascent = ppem, no descent) and use bit-aligned images with small metrics
+    (EBDT format 2) behind an offset array (EBLC index format 1).
+    """
+    from fontTools.ttLib import newTable
+    from fontTools.ttLib.tables.BitmapGlyphMetrics import SmallGlyphMetrics
+    from fontTools.ttLib.tables.E_B_D_T_ import ebdt_bitmap_classes
+    from fontTools.ttLib.tables.E_B_L_C_ import BitmapSizeTable, SbitLineMetrics, Strike, eblc_sub_table_classes
+
+    ebdt, eblc = newTable("EBDT"), newTable("EBLC")
+    ebdt.version = eblc.version = 2.0
+    ebdt.strikeData, eblc.strikes = [], []
+    glyph_order = font.getGlyphOrder()
+    for ppem, bitmaps in sorted(strikes.items()):
+        names = sorted(bitmaps, key=glyph_order.index)
+        glyph_data = {}
+        for name in names:
+            bitmap = bitmaps[name]
+            glyph = ebdt_bitmap_classes[2](None, None)
+            glyph.metrics = SmallGlyphMetrics()
+            glyph.metrics.height, glyph.metrics.width = bitmap.shape
+            glyph.metrics.BearingX, glyph.metrics.BearingY = 0, ppem
+            glyph.metrics.Advance = bitmap.shape[1]
+            glyph.imageData = np.packbits(bitmap).tobytes()
+            glyph_data[name] = glyph
+        ebdt.strikeData.append(glyph_data)
+
+        index = eblc_sub_table_classes[1](None, None)
+        index.indexFormat, index.imageFormat = 1, 2
+        index.names = names
+        strike = Strike()
+        strike.indexSubTables = [index]
+        size = strike.bitmapSizeTable = BitmapSizeTable()
+        width_max = max(bitmap.shape[1] for bitmap in bitmaps.values())
+        for direction in ("hori", "vert"):
+            line = SbitLineMetrics()
+            line.ascender, line.descender, line.widthMax = ppem, 0, width_max
+            line.caretSlopeNumerator, line.caretSlopeDenominator, line.caretOffset = 1, 0, 0
+            line.minOriginSB, line.minAdvanceSB, line.maxBeforeBL, line.minAfterBL = 0, 0, ppem, 0
+            line.pad1 = line.pad2 = 0
+            setattr(size, direction, line)
+        size.colorRef, size.ppemX, size.ppemY, size.bitDepth = 0, ppem, ppem, 1
+        size.flags = 1  # horizontal metrics
+        eblc.strikes.append(strike)
+    font["EBDT"], font["EBLC"] = ebdt, eblc
+
+
+def export_glyph_atlas(
+    masks: Dict[str, Tuple[str, Optional[np.ndarray]]],
+    output_list: Path,
+    max_size: int = gen_sprites.ATLAS_MAX_SIZE,
+    padding: int = gen_sprites.ATLAS_PADDING,
+) -> List[Path]:
+    """
+    Pack the undilated glyph masks ({char: (tile code, mask)}) into fonts/glyphs_N.png
+    sheets next to output_list and write output_list in the sprites.dl format: one
+    glyph_uniXXXX entry per character with its sheet rect, so the HUD can draw text
+    through the sprite batch instead of importing the TTF. Characters sharing a tile
+    share a rect; blank glyphs such as the space get no entry. Returns the written paths.
+    """
+    from PIL import Image
+
+    tiles: Dict[str, np.ndarray] = {}
+    for code, mask in masks.values():
+        if mask is not None and mask.any():
+            tiles.setdefault(code, mask)
+    if not tiles:
+        raise SystemExit("No glyph bitmaps to pack into the glyph atlas.")
+    sheets, rects = gen_sprites.pack_atlas(
+        {code: (mask.shape[1], mask.shape[0]) for code, mask in tiles.items()}, max_size, padding
+    )
+
+    writer = gen_sprites.OutputWriter(output_list.parent)
+    sheet_names = [f"fonts/glyphs_{i}.png" for i in range(len(sheets))]
+    images = [Image.new(gen_sprites.MASK_MODE, (side, side)) for side in sheets]
+    for code, (sheet, x, y, _, _) in rects.items():
+        layer = gen_sprites.slot_masks(tiles[code].view(np.uint8), [1], mode=gen_sprites.MASK_MODE)[1]
+        images[sheet].paste(layer, (x, y))
+    for name, img in zip(sheet_names, images):
+        writer.write_png(writer.root / name, img)
+
+    lines: List[str] = []
+    entries = [(ch, code) for ch, (code, _) in masks.items() if code in rects]
+    for ch, code in entries:
+        sheet, x, y, width, height = rects[code]
+        lines += ["--", f"name : glyph_uni{ord(ch):04X}", f"filename : {sheet_names[sheet]}", "rect :"]
+        lines.extend(f"    {key} : {value}" for key, value in zip("xywh", (x, y, width, height)))
+    writer.write(output_list, ("\n".join(lines) + "\n").encode("utf-8"))
+    logging.info("Glyph atlas: %d glyphs from %d tiles on %d sheet(s)", len(entries), len(tiles), len(sheets))
+    return [writer.root / name for name in writer.digests]
+
+
+def _glyph_mask(
+    code: str,
+    tile_pixels: Optional[np.ndarray],
+    scale: int,
+    tiles_dir: Path = TILES_DIR,
+    aliases_path: Path = ALIASES_PATH,
+) -> Optional[np.ndarray]:
+    if tile_pixels is not None:
+        return _tile_mask(code, tile_pixels, scale)
+    return _png_mask(code, tiles_dir, aliases_path)
+
+
+def load_glyph_masks(
+    charset: Iterable[str],
+    tile_pixels: Optional[np.ndarray] = None,
+    scale: int = gen_sprites.SCALE_FACTOR,
+    tiles_dir: Path = TILES_DIR,
+    aliases_path: Path = ALIASES_PATH,
+) -> Dict[str, Optional[np.ndarray]]:
+    """Undilated mask of every character in charset, decoded once for build_font's masks argument."""
+    with metrics.stage("load_bitmap"):
+        return {
+            ch: _glyph_mask(_conv_char(ch), tile_pixels, scale, tiles_dir, aliases_path)
+            for ch in dict.fromkeys(charset)
+            if ch != "\n"
+        }
+
+
+@lru_cache(maxsize=None)
+def _tracer_digest() -> bytes:
+    return hashlib.sha256(Path(__file__).read_bytes()).digest()
+
+
+class OutlineCache:
+    """
+    Traced glyph outlines kept on disk between builds, keyed by a hash of this
+    script (the tracer and simplifier live here) and the undilated bitmap, plus
+    the dilate and simplify settings. Outlines are stored in pixel coordinates,
+    so one entry serves every --upem. save() keeps only the entries looked up or
+    added since loading, so outlines of old glyphs or an old tracer are pruned.
+    With path None the cache lives in memory only, e.g. to share outlines
+    between font variants.
+    """
+
+    def __init__(self, path: Optional[Path] = OUTLINE_CACHE_PATH) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, object]] = {}
+        self.used: Set[str] = set()
+        self.dirty = False
+        if path is None:
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == OUTLINE_CACHE_VERSION:
+            self.entries = data.get("outlines", {})
+
+    @staticmethod
+    def key(mask: np.ndarray, dilate: int, simplify: bool, outline: int = 0) -> str:
+        digest = hashlib.sha256(_tracer_digest())
+        digest.update(np.asarray(mask.shape, dtype=np.int64).tobytes())
+        digest.update(np.packbits(mask).tobytes())
+        key = f"{digest.hexdigest()}:{dilate}:{int(simplify)}"
+        return f"{key}:o{outline}" if outline else key
+
+    def get(self, key: str) -> Optional[Tuple[int, int, List[List[Point]], int]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.used.add(key)
+        polygons = [[(x, y) for x, y in polygon] for polygon in entry["polygons"]]
+        return entry["width"], entry["height"], polygons, entry["traced_contours"]
+
+    def put(self, key: str, width: int, height: int, polygons: List[List[Point]], traced_contours: int) -> None:
+        self.entries[key] = {
+            "width": width,
+            "height": height,
+            "polygons": [[list(pt) for pt in polygon] for polygon in polygons],
+            "traced_contours": traced_contours,
+        }
+        self.used.add(key)
+        self.dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not (self.dirty or self.entries.keys() - self.used):
+            return
+        self.entries = {key: self.entries[key] for key in sorted(self.used)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": OUTLINE_CACHE_VERSION, "outlines": self.entries}
+        self.path.write_text(json.dumps(data, separators=(",", ":")) + "\n", encoding="utf-8")
+        self.dirty = False
+
+
 def build_font(
     charset: Iterable[str],
     output: Path,
@@ -219,16 +686,50 @@ def build_font(
     style: str,
     upem: int,
     dilate: int,
-) -> None:
+    tile_pixels: Optional[np.ndarray] = None,
+    scale: int = gen_sprites.SCALE_FACTOR,
+    simplify: bool = True,
+    outline_cache: Optional[OutlineCache] = None,
+    strikes: Sequence[int] = (),
+    bitmap_only: bool = False,
+    glyph_atlas: Optional[Path] = None,
+    masks: Optional[Dict[str, Optional[np.ndarray]]] = None,
+    tiles_dir: Path = TILES_DIR,
+    aliases_path: Path = ALIASES_PATH,
+    outline: int = 0,
+) -> List[Path]:
+    """
+    Build the font at output. With tile_pixels (the (256, 8, 8) index array of
+    gen_sprites.RomSet.tile_sheet()) glyphs come from the decoded tiles upscaled
+    by scale; without it they are traced from the tile PNGs in tiles_dir, with
+    aliases_path the dedupe alias table for tiles that were not written.
+    With simplify, outlines go through _simplify_polygons before the glyf table.
+    With outline_cache, glyphs whose bitmap was traced before skip dilation,
+    tracing and simplification; the cache file is updated at the end.
+    strikes adds an embedded 1-bit bitmap strike (EBDT/EBLC) per ppem, drawn from
+    the undilated tile pixels; bitmap_only leaves the outlines empty and ships
+    just the strikes. glyph_atlas names a datalist to write the same pixels to as
+    a sprite atlas (see export_glyph_atlas). masks holds undilated glyph masks
+    by character that were loaded already (see load_glyph_masks). outline > 0
+    traces a hollow ring that many pixels wide around each dilated glyph instead of
+    the filled glyph (see _finish_bitmap). Returns every path written.
+    """
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
     glyph_order = [".notdef"]
     glyphs: Dict[str, object] = {}
     h_metrics: Dict[str, Tuple[int, int]] = {}
     cmap: Dict[int, str] = {}
+    strike_bitmaps: Dict[int, Dict[str, np.ndarray]] = {ppem: {} for ppem in strikes}
+    atlas_masks: Dict[str, Tuple[str, Optional[np.ndarray]]] = {}
+    unsupported: List[str] = []
 
     notdef_pen = TTGlyphPen(None)
     glyphs[".notdef"] = notdef_pen.glyph()
     h_metrics[".notdef"] = (upem, 0)
 
+    outline_totals: Dict[str, int] = defaultdict(int)
     seen = set()
     for ch in charset:
         if ch in ("\n",):
@@ -237,10 +738,52 @@ def build_font(
             continue
         seen.add(ch)
         tile_code = _conv_char(ch)
-        width, height, on_pixels = _load_bitmap(tile_code, dilate)
-        polygons = _pixels_to_polygons(width, height, on_pixels)
-        glyph = _glyph_from_polygons(width, height, polygons, upem)
+        if masks is not None and ch in masks:
+            mask = masks[ch]
+        else:
+            with metrics.stage("load_bitmap"):
+                mask = _glyph_mask(tile_code, tile_pixels, scale, tiles_dir, aliases_path)
         glyph_name = f"uni{ord(ch):04X}"
+        atlas_masks[ch] = (tile_code, mask)
+        if ch not in TEXT_GLYPHS:
+            unsupported.append(ch)
+        if strike_bitmaps:
+            with metrics.stage("strike_bitmaps"):
+                for ppem, bitmaps in strike_bitmaps.items():
+                    bitmaps[glyph_name] = _strike_bitmap(mask, ppem)
+        cache_key = (
+            OutlineCache.key(mask, dilate, simplify, outline) if outline_cache is not None and mask is not None else None
+        )
+        cached = outline_cache.get(cache_key) if cache_key is not None else None
+        if bitmap_only:
+            width, height = _finish_bitmap(mask, 1)[:2]
+            polygons, traced_contours = [], 0
+        elif cached is not None:
+            metrics.count("outline_cache_hits")
+            width, height, polygons, traced_contours = cached
+        else:
+            with metrics.stage("dilate"):
+                width, height, on_pixels = _finish_bitmap(mask, dilate, outline)
+            with metrics.stage("trace_contours"):
+                polygons = _pixels_to_polygons(width, height, on_pixels)
+            traced_contours = len(polygons)
+            if simplify:
+                with metrics.stage("simplify"):
+                    polygons = _simplify_polygons(polygons)
+            if cache_key is not None:
+                metrics.count("outline_cache_misses")
+                outline_cache.put(cache_key, width, height, polygons, traced_contours)
+        with metrics.stage("build_glyph"):
+            glyph = _glyph_from_polygons(width, height, polygons, upem)
+        stats = {
+            "contours": len(polygons),
+            "points": sum(len(polygon) - 1 for polygon in polygons),
+            "traced_contours": traced_contours,
+            "pixel_edges": _outline_length(polygons),
+        }
+        metrics.record("glyphs", ch, **stats)
+        for key, value in stats.items():
+            outline_totals[key] += value
         glyph_order.append(glyph_name)
         glyphs[glyph_name] = glyph
         h_metrics[glyph_name] = (glyph.width, 0)
@@ -248,41 +791,164 @@ def build_font(
 
     if len(glyph_order) == 1:
         raise SystemExit("No glyphs generated; check charset and tile PNGs.")
-
-    fb = FontBuilder(upem, isTTF=True)
-    fb.setupGlyphOrder(glyph_order)
-    fb.setupCharacterMap(cmap)
-    fb.setupGlyf(glyphs)
-    fb.setupHorizontalMetrics(h_metrics)
-
-    ascent = upem
-    descent = 0
-    fb.setupHorizontalHeader(ascent=ascent, descent=descent)
-    fb.setupOS2(
-        sTypoAscender=ascent,
-        sTypoDescender=descent,
-        sTypoLineGap=0,
-        usWinAscent=ascent,
-        usWinDescent=-descent,
-        usWeightClass=400,
-        usWidthClass=5,
-        fsType=0,
-    )
-    fb.setupNameTable(
-        {
-            "familyName": family,
-            "styleName": style,
-            "fullName": f"{family} {style}",
-            "uniqueFontIdentifier": f"{family}-{style}",
-            "psName": f"{family}-{style}".replace(" ", ""),
-        }
+    if outline_cache is not None:
+        outline_cache.save()
+    if unsupported:
+        logging.warning("No text tile for %r; _conv_char maps them to unrelated tiles", "".join(unsupported))
+    edges, points = outline_totals["pixel_edges"], outline_totals["points"]
+    if strike_bitmaps:
+        logging.info("Bitmap strikes: %s ppem", ", ".join(str(ppem) for ppem in sorted(strike_bitmaps)))
+    logging.info(
+        "Outlines: %d points for %d pixel edges (%.0f%% fewer), %d contours (%d traced)",
+        points,
+        edges,
+        100.0 * (edges - points) / edges if edges else 0.0,
+        outline_totals["contours"],
+        outline_totals["traced_contours"],
     )
-    fb.setupPost()
-    fb.setupMaxp()
+
+    with metrics.stage("font_tables"):
+        fb = FontBuilder(upem, isTTF=True)
+        fb.setupGlyphOrder(glyph_order)
+        fb.setupCharacterMap(cmap)
+        fb.setupGlyf(glyphs)
+        fb.setupHorizontalMetrics(h_metrics)
+
+        ascent = upem
+        descent = 0
+        fb.setupHorizontalHeader(ascent=ascent, descent=descent)
+        fb.setupOS2(
+            sTypoAscender=ascent,
+            sTypoDescender=descent,
+            sTypoLineGap=0,
+            usWinAscent=ascent,
+            usWinDescent=-descent,
+            usWeightClass=400,
+            usWidthClass=5,
+            fsType=0,
+        )
+        fb.setupNameTable(
+            {
+                "familyName": family,
+                "styleName": style,
+                "fullName": f"{family} {style}",
+                "uniqueFontIdentifier": f"{family}-{style}",
+                "psName": f"{family}-{style}".replace(" ", ""),
+            }
+        )
+        fb.setupPost()
+        fb.setupMaxp()
+        if strike_bitmaps:
+            _setup_bitmap_strikes(fb.font, strike_bitmaps)
 
     output.parent.mkdir(parents=True, exist_ok=True)
-    fb.save(str(output))
+    with metrics.stage("save"):
+        fb.save(str(output))
+    metrics.count("files_written")
+    metrics.count("bytes_written", output.stat().st_size)
     logging.info("Saved %s", output)
+    written = [output]
+    if glyph_atlas is not None:
+        with metrics.stage("glyph_atlas"):
+            written += export_glyph_atlas(atlas_masks, glyph_atlas)
+    return written
+
+
+class FontVariant(NamedTuple):
+    """One font of a --variants batch; fields left out of the spec take the command-line values."""
+
+    output: Path
+    family: str
+    style: str
+    upem: int
+    dilate: int
+    outline: int = 0
+    strikes: Tuple[int, ...] = ()
+
+
+def load_variants(path: Path, defaults: FontVariant) -> List[FontVariant]:
+    """
+    Read a JSON list of variant specs such as {"output": "fonts/pacman_bold.ttf",
+    "style": "Bold", "dilate": 3} or {"style": "Outline", "outline": 2, ...}; outputs
+    are relative to assets/ and strikes use the --strikes syntax.
+    """
+    variants = []
+    for spec in json.loads(path.read_text(encoding="utf-8")):
+        unknown = set(spec) - set(FontVariant._fields)
+        if unknown or "output" not in spec:
+            raise ValueError(f"{path}: variant {spec!r} needs an output and only {', '.join(FontVariant._fields)}")
+        dilate = max(1, spec.get("dilate", defaults.dilate))
+        if spec.get("outline", 0) < 0:
+            raise ValueError(f"{path}: variant {spec['output']!r} has a negative outline")
+        fields = {
+            **spec,
+            "output": gen_sprites.ASSET_DIR / spec["output"],
+            "dilate": dilate if dilate % 2 == 1 else dilate + 1,
+            "strikes": tuple(parse_strike_sizes(spec["strikes"])) if "strikes" in spec else defaults.strikes,
+        }
+        variants.append(defaults._replace(**fields))
+    return variants
+
+
+def _trace_glyph(job: Tuple[np.ndarray, int, int, bool]) -> Tuple[int, int, List[List[Point]], int]:
+    """Dilate, trace and optionally simplify one glyph mask (runs in pool workers)."""
+    mask, dilate, outline, simplify = job
+    width, height, on_pixels = _finish_bitmap(mask, dilate, outline)
+    polygons = _pixels_to_polygons(width, height, on_pixels)
+    traced_contours = len(polygons)
+    if simplify:
+        polygons = _simplify_polygons(polygons)
+    return width, height, polygons, traced_contours
+
+
+def build_variants(
+    charset: str,
+    variants: Sequence[FontVariant],
+    tile_pixels: Optional[np.ndarray] = None,
+    scale: int = gen_sprites.SCALE_FACTOR,
+    simplify: bool = True,
+    outline_cache: Optional[OutlineCache] = None,
+    pool: Optional[Executor] = None,
+) -> List[Path]:
+    """
+    Build every variant in one pass: glyph masks are decoded once, each distinct
+    (glyph, dilate, outline) shape is traced once (fanned out across pool when given) into
+    outline_cache, and the fonts are then assembled from the shared outlines.
+    """
+    cache = outline_cache if outline_cache is not None else OutlineCache(None)
+    masks = load_glyph_masks(charset, tile_pixels, scale)
+    jobs: Dict[str, Tuple[np.ndarray, int, int, bool]] = {}
+    for dilate, outline in sorted({(variant.dilate, variant.outline) for variant in variants}):
+        for mask in masks.values():
+            if mask is not None:
+                key = OutlineCache.key(mask, dilate, simplify, outline)
+                if key not in jobs and cache.get(key) is None:
+                    jobs[key] = (mask, dilate, outline, simplify)
+    with metrics.stage("trace_variants"):
+        traced = pool.map(_trace_glyph, jobs.values()) if pool is not None else map(_trace_glyph, jobs.values())
+        for key, outline in zip(jobs, traced):
+            cache.put(key, *outline)
+    metrics.count("outline_cache_misses", len(jobs))
+    logging.info("Traced %d outlines for %d variants of %d glyphs", len(jobs), len(variants), len(masks))
+
+    written: List[Path] = []
+    for variant in variants:
+        written += build_font(
+            charset,
+            variant.output,
+            variant.family,
+            variant.style,
+            variant.upem,
+            variant.dilate,
+            tile_pixels,
+            scale,
+            simplify,
+            cache,
+            variant.strikes,
+            masks=masks,
+            outline=variant.outline,
+        )
+    return written
 
 
 def _read_charset(args: argparse.Namespace) -> str:
@@ -305,6 +971,12 @@ def main() -> None:
         "--charset-file",
         help="Read characters from file (newline characters are ignored).",
     )
+    parser.add_argument(
+        "--charset-from-sources",
+        action="store_true",
+        help="Use only the characters the game prints, scanned from the Lua sources and .dl assets "
+        "(see scan_charset), instead of --charset.",
+    )
     parser.add_argument(
         "--family",
         default="Pacman Tiles",
@@ -327,25 +999,155 @@ def main() -> None:
         default=1,
         help="Odd MaxFilter kernel size for expanding pixels before tracing (default: %(default)d).",
     )
+    parser.add_argument(
+        "--outline",
+        type=int,
+        default=0,
+        help="Trace a hollow outline this many pixels wide around each glyph instead of filling it "
+        "(default: %(default)d, filled).",
+    )
+    parser.add_argument(
+        "--tiles-from",
+        choices=("rom", "png"),
+        default="rom",
+        help="Decode glyphs from the tile ROM dump or trace the exported tile PNGs (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rom-tiles",
+        type=Path,
+        default=gen_sprites.ROM_TILES_PATH,
+        help="Tile ROM dump used with --tiles-from rom (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=gen_sprites.SCALE_FACTOR,
+        help="Upscale factor of the ROM tiles before dilating and tracing (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--no-simplify",
+        dest="simplify",
+        action="store_false",
+        help="Keep traced outlines as they are instead of dropping redundant points and merging touching contours.",
+    )
+    parser.add_argument(
+        "--outline-cache",
+        type=Path,
+        default=OUTLINE_CACHE_PATH,
+        help="File of traced outlines reused across builds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-outline-cache",
+        action="store_true",
+        help="Trace every glyph and leave the outline cache untouched.",
+    )
+    parser.add_argument(
+        "--strikes",
+        default="",
+        metavar="SIZES",
+        help="Embed 1-bit bitmap strikes (EBDT/EBLC) at these comma-separated ppem sizes; "
+        "`tile` is cfg.display.tile from config.dl, e.g. --strikes tile,32,48.",
+    )
+    parser.add_argument(
+        "--bitmap-only",
+        action="store_true",
+        help="Ship only the --strikes bitmaps with empty outlines (for rasterizers that read EBDT).",
+    )
+    parser.add_argument(
+        "--glyph-atlas",
+        nargs="?",
+        const=GLYPH_ATLAS_LIST_PATH,
+        type=Path,
+        metavar="PATH",
+        help="Also pack the glyphs into fonts/glyphs_N.png sheets next to PATH and list their rects "
+        f"there in the sprites.dl format (default PATH: {GLYPH_ATLAS_LIST_PATH}).",
+    )
     parser.add_argument(
         "--output",
         type=Path,
         default=ROOT_DIR.parent / "assets" / "fonts" / "pacman.ttf",
         help="Output TTF path.",
     )
+    parser.add_argument(
+        "--variants",
+        type=Path,
+        metavar="PATH",
+        help="Build every font listed in this JSON file in one run, sharing decoded and traced glyphs "
+        "(see load_variants); the options above are the defaults of each variant.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for tracing --variants glyphs; 0 uses every CPU (default: %(default)d).",
+    )
     parser.add_argument(
         "--verbose", action="store_true", help="Enable verbose logging."
     )
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s: %(message)s")
-    charset = _read_charset(args)
+    if args.scale < 1:
+        parser.error("--scale must be at least 1.")
+    if args.charset_from_sources:
+        charset, notes = scan_charset()
+        for note in notes:
+            logging.warning("%s; add its characters with --charset if they are not covered", note)
+        logging.info("Charset from sources: %r", charset)
+    else:
+        charset = _read_charset(args)
     if not charset:
         raise SystemExit("Charset is empty.")
+    try:
+        strikes = parse_strike_sizes(args.strikes)
+    except ValueError as exc:
+        parser.error(f"--strikes: {exc}")
+    if args.bitmap_only and not strikes:
+        parser.error("--bitmap-only needs --strikes.")
+    if args.outline < 0:
+        parser.error("--outline must not be negative.")
     dilate = args.dilate if args.dilate % 2 == 1 else args.dilate + 1
     if dilate < 1:
         dilate = 1
-    build_font(charset, args.output, args.family, args.style, args.upem, dilate)
+    variants: List[FontVariant] = []
+    if args.variants:
+        defaults = FontVariant(args.output, args.family, args.style, args.upem, dilate, args.outline, tuple(strikes))
+        try:
+            variants = load_variants(args.variants, defaults)
+        except ValueError as exc:
+            parser.error(f"--variants: {exc}")
+        if args.bitmap_only or args.glyph_atlas:
+            parser.error("--bitmap-only and --glyph-atlas apply to single builds, not --variants.")
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with ExitStack() as stack:
+        stack.enter_context(pipeline_metrics.instrumented(args, emit=logging.info))
+        tile_pixels = None
+        if args.tiles_from == "rom":
+            with metrics.stage("decode_tiles"):
+                rom_tiles = gen_sprites.load_rom_file(args.rom_tiles, gen_sprites.ROM_TILES_SIZE)
+                tile_pixels = gen_sprites.decode_images(rom_tiles, gen_sprites.TILE_STRIDE, gen_sprites.TILE_GATHER)
+        outline_cache = None if args.no_outline_cache else OutlineCache(args.outline_cache)
+        if variants:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs)) if jobs > 1 else None
+            build_variants(charset, variants, tile_pixels, args.scale, args.simplify, outline_cache, pool)
+            return
+        build_font(
+            charset,
+            args.output,
+            args.family,
+            args.style,
+            args.upem,
+            dilate,
+            tile_pixels,
+            args.scale,
+            args.simplify,
+            outline_cache,
+            strikes,
+            args.bitmap_only,
+            args.glyph_atlas,
+            outline=args.outline,
+        )
 
 
 if __name__ == "__main__":
@@ -7,12 +7,77 @@ matching the raw layering pacman.c feeds into its render pipeline.
 Usage:
 1. Save the 4096-byte sprite ROM as rom_sprites.bin and the 4096-byte tile ROM as rom_tiles.bin.
 2. Run the script; PNGs will be written to ../assets/sprites and ../assets/tiles (relative to this file).
+   The static maze is also baked into a single colored sprites/maze_background.png (dots and pills
+   excluded); ../assets/sprites.dl must list it as maze_background, which the script checks.
+3. Optionally pass --atlas to also pack every layer into power-of-two sheets under ../assets/atlas
+   and write ../assets/sprites_atlas.dl, a copy of sprites.dl whose entries point at sheet rects.
+   Set assets.sprites in ../assets/config.dl to "assets/sprites_atlas.dl" to have main.lua load it.
+4. Optionally pass --strips to write one strip per animation direction of ../assets/profiles.dl
+   under ../assets/strips, frames left to right in playback order, and ../assets/strips.dl with
+   the anim8 grid (frame size, columns in playback order, duration, sx/sy) of each.
+5. Optionally pass --actors to write the Pac-Man and ghost sprites fully colored under each of their
+   color codes (blinky ... eyes, plus the frightened sprites) to ../assets/actors, listed as <code>_<frame> in ../assets/actors.dl,
+   so an actor frame is one draw instead of one tinted layer per palette slot.
+
+Runs are incremental: a manifest in .cache/ records a hash of the ROMs, palette tables, the scripts
+in this directory and the export settings. When nothing changed the export is skipped, and otherwise only files whose
+bytes differ are rewritten. Pass --force to ignore the manifest.
+
+PNGs are written with --png-profile compact by default: masks and the background are stored
+losslessly as 1-bit or palette images at zlib level 9, which decode to the same pixels as the
+full-depth images of --png-profile fast; smallest adds the encoder's optimize pass.
+
+Mask building and PNG encoding can be spread over worker processes with --jobs N (0 = all CPUs);
+output names, contents and ordering are identical to a serial run.
+
+With --dedupe, layers whose PNG bytes equal an earlier layer are recorded as aliases: ../assets/sprite_aliases.json
+maps each one to its canonical file, the atlas packs canonical layers only, and without --atlas
+../assets/sprites_dedup.dl is written with the aliased entries redirected. main.lua loads the sprite list
+named by assets.sprites in ../assets/config.dl; while that is sprites.dl the aliased files are still
+written, and pointing it at sprites_dedup.dl (or sprites_atlas.dl) drops them. The script refuses to
+run when config.dl names a generated list the chosen options do not produce.
+
+Tile layers follow what the game actually draws: the maze in ../assets/config.dl (map.tiles, also
+used for the baked background), the text glyphs, and every tile layer ../assets/sprites.dl names;
+slots that stay black under all of a tile's colors are skipped. Pass --tile-usage simulate to export
+everything the original arcade screens show instead.
+
+ROM dumps are memory-mapped rather than read into Python lists. To batch several ROM variants,
+pass --rom-dir DIR: each subdirectory of DIR holding both dumps is exported in turn to
+--variants-output/<subdirectory name>, and dumps directly in DIR to --variants-output/default,
+keeping only one set resident at a time.
+
+--timings prints wall/CPU time per stage plus files and bytes written and images skipped as
+transparent, --timings-json PATH writes the same as JSON, and --profile [PATH] runs the export
+under cProfile and prints the hottest functions (see pipeline_metrics.py, shared with gen_fonts.py).
+
+The module can also be imported as a library: importing it touches no files and does not load PIL.
+RomSet holds one pair of dumps and caches their decoded index arrays, so a long-running process can
+keep it and call export_rom_set() (or the individual decode/export functions) repeatedly.
 """
 
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
 from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Set, Tuple
-from PIL import Image
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+import pipeline_metrics
+from pipeline_metrics import metrics
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 # ---------------------------------------------------------------------------
 # 1) ROM data that must be provided
@@ -24,9 +89,6 @@ ROM_TILES_PATH = Path(f"{CURRENT_DIR}/rom_tiles.bin")
 ROM_SPRITES_SIZE = 4096  # 64 sprites * 64 bytes
 ROM_TILES_SIZE = 4096    # 256 tiles * 16 bytes
 
-rom_sprites: List[int] = []
-rom_tiles: List[int] = []
-
 rom_hwcolors: Sequence[int] = [
     0x0, 0x7, 0x66, 0xef, 0x0, 0xf8, 0xea, 0x6f,
     0x0, 0x3f, 0x0, 0xc9, 0x38, 0xaa, 0xaf, 0xf6,
@@ -66,8 +128,16 @@ BLOCKS = [
     ((0, 12), 32), ((8, 12),  0),
 ]
 
+# Tiles use the same bitplane encoding with two stacked 8x4 blocks
+TILE_BLOCKS = [
+    ((0, 0), 8),
+    ((0, 4), 0),
+]
+
 DISPLAY_TILES_X = 28
 DISPLAY_TILES_Y = 36
+PLAYFIELD_TOP = 3                       # first maze row in video RAM
+PLAYFIELD_BOTTOM = DISPLAY_TILES_Y - 2  # one past the last maze row
 NUM_LIVES = 3
 NUM_STATUS_FRUITS = 7
 
@@ -146,48 +216,90 @@ PILL_POSITIONS: Sequence[Tuple[int, int]] = [
     (1, 6), (26, 6), (1, 26), (26, 26)
 ]
 
+# (tile code, color code) pairs are tracked in a dense bitset: one row per tile, one column per color
+TILE_CODES = 256
+COLOR_CODES_COUNT = 32
+
+TileArg = Union[int, np.ndarray, None]
+
+
 class TileState:
-    def __init__(self) -> None:
-        self.video = [[TILE_SPACE for _ in range(DISPLAY_TILES_X)] for _ in range(DISPLAY_TILES_Y)]
-        self.color = [[0 for _ in range(DISPLAY_TILES_X)] for _ in range(DISPLAY_TILES_Y)]
-        self.usage: Dict[int, Set[int]] = defaultdict(set)
+    """
+    Video and color RAM of the 28x36 tile display as uint8 grids, plus a 256x32
+    bitset of every (tile code, color code & 0x1F) pair ever shown. Every write
+    is a clipped rectangle that updates the grids and the bitset as whole-array
+    operations; the single-cell helpers are 1x1 rectangles.
+    """
 
-    def _record(self, x: int, y: int) -> None:
-        tile = self.video[y][x]
-        color = self.color[y][x] & 0x1F
-        self.usage[tile].add(color)
+    def __init__(self) -> None:
+        self.video = np.full((DISPLAY_TILES_Y, DISPLAY_TILES_X), TILE_SPACE, dtype=np.uint8)
+        self.color = np.zeros((DISPLAY_TILES_Y, DISPLAY_TILES_X), dtype=np.uint8)
+        self.usage = np.zeros((TILE_CODES, COLOR_CODES_COUNT), dtype=bool)
+
+    def fill(
+        self,
+        rect: Tuple[int, int, int, int],
+        tile_code: TileArg = None,
+        color_code: TileArg = None,
+    ) -> None:
+        """
+        Write tile and/or color codes (None keeps the current value) into the
+        (x, y, width, height) rectangle. Codes are scalars or (height, width)
+        arrays; cells outside the display are dropped.
+        """
+        x, y, width, height = rect
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, DISPLAY_TILES_X), min(y + height, DISPLAY_TILES_Y)
+        if x0 >= x1 or y0 >= y1:
+            return
+        cells = (slice(y0, y1), slice(x0, x1))
+        source = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        for grid, codes in ((self.video, tile_code), (self.color, color_code)):
+            if codes is None:
+                continue
+            if np.ndim(codes):
+                codes = np.broadcast_to(np.asarray(codes, dtype=np.uint8), (height, width))[source]
+            grid[cells] = codes
+        self.usage[self.video[cells], self.color[cells] & 0x1F] = True
 
     def clear(self, tile_code: int, color_code: int) -> None:
-        for y in range(DISPLAY_TILES_Y):
-            for x in range(DISPLAY_TILES_X):
-                self.video[y][x] = tile_code
-                self.color[y][x] = color_code
-                self._record(x, y)
+        self.fill((0, 0, DISPLAY_TILES_X, DISPLAY_TILES_Y), tile_code, color_code)
 
     def color_playfield(self, color_code: int) -> None:
-        for y in range(3, DISPLAY_TILES_Y - 2):
-            for x in range(DISPLAY_TILES_X):
-                self.color[y][x] = color_code
-                self._record(x, y)
+        self.fill((0, PLAYFIELD_TOP, DISPLAY_TILES_X, PLAYFIELD_BOTTOM - PLAYFIELD_TOP), color_code=color_code)
 
     def tile(self, pos: Tuple[int, int], tile_code: int) -> None:
-        x, y = pos
-        if 0 <= x < DISPLAY_TILES_X and 0 <= y < DISPLAY_TILES_Y:
-            self.video[y][x] = tile_code
-            self._record(x, y)
+        self.fill((*pos, 1, 1), tile_code=tile_code)
 
     def color_only(self, pos: Tuple[int, int], color_code: int) -> None:
-        x, y = pos
-        if 0 <= x < DISPLAY_TILES_X and 0 <= y < DISPLAY_TILES_Y:
-            self.color[y][x] = color_code
-            self._record(x, y)
+        self.fill((*pos, 1, 1), color_code=color_code)
 
     def color_tile(self, pos: Tuple[int, int], color_code: int, tile_code: int) -> None:
-        x, y = pos
-        if 0 <= x < DISPLAY_TILES_X and 0 <= y < DISPLAY_TILES_Y:
-            self.video[y][x] = tile_code
-            self.color[y][x] = color_code
-            self._record(x, y)
+        self.fill((*pos, 1, 1), tile_code, color_code)
+
+    def text(self, pos: Tuple[int, int], text: str, color_code: Optional[int] = None) -> None:
+        """Write a row of characters (conv_char codes) starting at pos, clipped to the display."""
+        if not text:
+            return
+        codes = np.array([conv_char(ch) for ch in text], dtype=np.uint8)[None, :]
+        self.fill((*pos, len(text), 1), codes, color_code)
+
+    def quad(self, pos: Tuple[int, int], color_code: int, tile_code: int) -> None:
+        """Write a 2x2 sprite-like block of tiles in the mirrored order vid_draw_tile_quad uses."""
+        codes = tile_code + np.array([[1, 0], [3, 2]], dtype=np.uint8)
+        self.fill((*pos, 2, 2), codes, color_code)
+
+    def usage_map(self) -> Dict[int, Set[int]]:
+        return usage_bits_to_map(self.usage)
+
+
+def usage_bits_to_map(usage_bits: np.ndarray) -> Dict[int, Set[int]]:
+    """Convert a 256x32 usage bitset to {tile code: {color codes}} for the tiles that were shown."""
+    tiles, colors = np.nonzero(usage_bits)
+    usage: Dict[int, Set[int]] = defaultdict(set)
+    for tile_code, color_code in zip(tiles.tolist(), colors.tolist()):
+        usage[tile_code].add(color_code)
+    return dict(usage)
 
 
 def conv_char(c: str) -> int:
@@ -213,172 +325,309 @@ def vid_char(state: TileState, tile_pos: Tuple[int, int], char: str) -> None:
 
 
 def vid_color_text(state: TileState, tile_pos: Tuple[int, int], color_code: int, text: str) -> None:
-    x, y = tile_pos
-    for ch in text:
-        if x >= DISPLAY_TILES_X:
-            break
-        vid_color_char(state, (x, y), color_code, ch)
-        x += 1
+    state.text(tile_pos, text, color_code & 0x1F)
 
 
 def vid_text(state: TileState, tile_pos: Tuple[int, int], text: str) -> None:
-    x, y = tile_pos
-    for ch in text:
-        if x >= DISPLAY_TILES_X:
-            break
-        vid_char(state, (x, y), ch)
-        x += 1
+    state.text(tile_pos, text)
 
 
 def vid_color_score(state: TileState, tile_pos: Tuple[int, int], color_code: int, score: int) -> None:
+    # Scores are stored divided by ten: the last digit is a fixed '0' at tile_pos and
+    # up to eight digits of score run leftwards from it.
     x, y = tile_pos
-    vid_color_char(state, (x, y), color_code, '0')
-    x -= 1
-    tmp = score
-    for _ in range(8):
-        digit_char = chr((tmp % 10) + ord('0'))
-        if x < 0:
-            break
-        vid_color_char(state, (x, y), color_code, digit_char)
-        x -= 1
-        tmp //= 10
-        if tmp == 0:
-            break
+    digits = str(score)[-8:]
+    state.text((x - len(digits), y), digits + "0", color_code & 0x1F)
 
 
 def vid_draw_tile_quad(state: TileState, tile_pos: Tuple[int, int], color_code: int, tile_code: int) -> None:
-    base_x, base_y = tile_pos
-    for yy in range(2):
-        for xx in range(2):
-            t = tile_code + yy * 2 + (1 - xx)
-            state.color_tile((base_x + xx, base_y + yy), color_code, t)
+    state.quad(tile_pos, color_code, tile_code)
 
 
 def vid_fruit_score(state: TileState, fruit_type: int) -> None:
     palette_code = COLOR_CODE_LOOKUP["dot"] if fruit_type == FRUIT_NONE else COLOR_CODE_LOOKUP["fruit_score"]
-    for idx, tile_code in enumerate(FRUIT_SCORE_TILES[fruit_type]):
-        state.color_tile((12 + idx, 20), palette_code, tile_code)
+    state.fill((12, 20, 4, 1), np.array([FRUIT_SCORE_TILES[fruit_type]], dtype=np.uint8), palette_code)
+
 
+PLAYFIELD_TILE_CODES = {chr(i): TILE_DOT_CODE for i in range(128)}
+PLAYFIELD_TILE_CODES.update({
+    ' ': TILE_SPACE, '0': 0xD1, '1': 0xD0, '2': 0xD5, '3': 0xD4, '4': 0xFB,
+    '5': 0xFA, '6': 0xD7, '7': 0xD9, '8': 0xD6, '9': 0xD8, 'U': 0xDB,
+    'L': 0xD3, 'R': 0xD2, 'B': 0xDC, 'b': 0xDF, 'e': 0xE7, 'f': 0xE6,
+    'g': 0xEB, 'h': 0xEA, 'l': 0xE8, 'r': 0xE9, 'u': 0xE5, 'w': 0xF5,
+    'x': 0xF2, 'y': 0xF3, 'z': 0xF4, 'm': 0xED, 'n': 0xEC, 'o': 0xEF,
+    'p': 0xEE, 'j': 0xDD, 'i': 0xD2, 'k': 0xDB, 'q': 0xD3, 's': 0xF1,
+    't': 0xF0, '-': TILE_DOOR, 'P': TILE_PILL, '.': TILE_DOT_CODE,
+})
 
-def game_init_playfield(state: TileState) -> None:
+
+# first display row of the maze and its rows of map characters, as in assets/config.dl
+MapLayout = Tuple[int, Sequence[str]]
+
+
+def game_init_playfield(state: TileState, layout: MapLayout) -> None:
+    top, rows = layout
     state.color_playfield(COLOR_CODE_LOOKUP["dot"])
-    tiles = (
-        "0UUUUUUUUUUUU45UUUUUUUUUUUU1"
-        "L............rl............R"
-        "L.ebbf.ebbbf.rl.ebbbf.ebbf.R"
-        "LPr  l.r   l.rl.r   l.r  lPR"
-        "L.guuh.guuuh.gh.guuuh.guuh.R"
-        "L..........................R"
-        "L.ebbf.ef.ebbbbbbf.ef.ebbf.R"
-        "L.guuh.rl.guuyxuuh.rl.guuh.R"
-        "L......rl....rl....rl......R"
-        "2BBBBf.rzbbf rl ebbwl.eBBBB3"
-        "     L.rxuuh gh guuyl.R     "
-        "     L.rl          rl.R     "
-        "     L.rl mjs--tjn rl.R     "
-        "UUUUUh.gh i      q gh.gUUUUU"
-        "      .   i      q   .      "
-        "BBBBBf.ef i      q ef.eBBBBB"
-        "     L.rl okkkkkkp rl.R     "
-        "     L.rl          rl.R     "
-        "     L.rl ebbbbbbf rl.R     "
-        "0UUUUh.gh guuyxuuh gh.gUUUU1"
-        "L............rl............R"
-        "L.ebbf.ebbbf.rl.ebbbf.ebbf.R"
-        "L.guyl.guuuh.gh.guuuh.rxuh.R"
-        "LP..rl.......  .......rl..PR"
-        "6bf.rl.ef.ebbbbbbf.ef.rl.eb8"
-        "7uh.gh.rl.guuyxuuh.rl.gh.gu9"
-        "L......rl....rl....rl......R"
-        "L.ebbbbwzbbf.rl.ebbwzbbbbf.R"
-        "L.guuuuuuuuh.gh.guuuuuuuuh.R"
-        "L..........................R"
-        "2BBBBBBBBBBBBBBBBBBBBBBBBBB3"
+    codes = np.array(
+        [[PLAYFIELD_TILE_CODES.get(ch, TILE_DOT_CODE) for ch in row] for row in rows],
+        dtype=np.uint8,
     )
-    mapping = {chr(i): TILE_DOT_CODE for i in range(128)}
-    mapping.update({
-        ' ': TILE_SPACE, '0': 0xD1, '1': 0xD0, '2': 0xD5, '3': 0xD4, '4': 0xFB,
-        '5': 0xFA, '6': 0xD7, '7': 0xD9, '8': 0xD6, '9': 0xD8, 'U': 0xDB,
-        'L': 0xD3, 'R': 0xD2, 'B': 0xDC, 'b': 0xDF, 'e': 0xE7, 'f': 0xE6,
-        'g': 0xEB, 'h': 0xEA, 'l': 0xE8, 'r': 0xE9, 'u': 0xE5, 'w': 0xF5,
-        'x': 0xF2, 'y': 0xF3, 'z': 0xF4, 'm': 0xED, 'n': 0xEC, 'o': 0xEF,
-        'p': 0xEE, 'j': 0xDD, 'i': 0xD2, 'k': 0xDB, 'q': 0xD3, 's': 0xF1,
-        't': 0xF0, '-': TILE_DOOR, 'P': TILE_PILL, '.': TILE_DOT_CODE,
-    })
-
-    idx = 0
-    for y in range(3, 34):
-        for x in range(DISPLAY_TILES_X):
-            ch = tiles[idx]
-            idx += 1
-            state.tile((x, y), mapping.get(ch, TILE_DOT_CODE))
-    state.color_only((13, 15), 0x18)
-    state.color_only((14, 15), 0x18)
-
-
-def simulate_tile_usage() -> Dict[int, Set[int]]:
-    state = TileState()
+    state.fill((0, top, DISPLAY_TILES_X, len(rows)), codes)
+    for y, x in np.argwhere(codes == TILE_DOOR).tolist():
+        state.color_only((x, top + y), COLOR_CODE_LOOKUP["ghost_score"])
 
-    state.clear(TILE_SPACE, COLOR_CODE_LOOKUP["dot"])
-    vid_color_text(state, (9, 0), COLOR_CODE_LOOKUP["default"], "HIGH SCORE")
-    game_init_playfield(state)
-    vid_color_text(state, (9, 14), COLOR_CODE_LOOKUP["inky"], "PLAYER ONE")
-    vid_color_text(state, (11, 20), COLOR_CODE_LOOKUP["pacman"], "READY!")
-    vid_color_text(state, (11, 20), COLOR_CODE_LOOKUP["dot"], "      ")
-    vid_color_score(state, (6, 1), COLOR_CODE_LOOKUP["default"], 98765432)
-    vid_color_score(state, (16, 1), COLOR_CODE_LOOKUP["default"], 0)
-    for idx, digit in enumerate("0123456789"):
-        # Keep all digits inside the 28-column tile viewport so usage is recorded.
-        vid_color_char(state, (18 + idx, 2), COLOR_CODE_LOOKUP["default"], digit)
 
-    for color_code in (COLOR_CODE_LOOKUP["pacman"], 0):
-        vid_draw_tile_quad(state, (2, 34), color_code, TILE_LIFE)
+# A screen script is a list of (helper, *args) steps, each applied as helper(state, *args)
+ScreenScript = Sequence[Tuple]
 
-    for tile_code, _, color_code in FRUIT_TILES_COLORS:
-        if tile_code:
-            vid_draw_tile_quad(state, (10, 0), color_code, tile_code)
-    for fruit in range(NUM_FRUITS):
-        vid_fruit_score(state, fruit)
 
-    for pos in PILL_POSITIONS:
-        state.color_only(pos, COLOR_CODE_LOOKUP["dot"])
-        state.color_only(pos, 0)
+def apply_screen_script(state: TileState, script: ScreenScript) -> TileState:
+    for step in script:
+        helper, *args = step
+        helper(state, *args)
+    return state
 
-    state.color_playfield(COLOR_CODE_LOOKUP["white_border"])
-    state.color_playfield(COLOR_CODE_LOOKUP["dot"])
 
-    vid_color_text(state, (9, 20), COLOR_CODE_LOOKUP["blinky"], "GAME  OVER")
+def simulate_screens(scripts: Iterable[ScreenScript]) -> np.ndarray:
+    """Run every script on a fresh display and return the union of their usage bitsets."""
+    usage = np.zeros((TILE_CODES, COLOR_CODES_COUNT), dtype=bool)
+    for script in scripts:
+        usage |= apply_screen_script(TileState(), script).usage
+    return usage
+
 
-    state.clear(TILE_SPACE, COLOR_CODE_LOOKUP["default"])
-    vid_text(state, (3, 0), "1UP   HIGH SCORE   2UP")
-    vid_color_score(state, (6, 1), COLOR_CODE_LOOKUP["default"], 0)
-    vid_text(state, (7, 5), "CHARACTER / NICKNAME")
-    vid_text(state, (3, 35), "CREDIT  0")
+def game_screen_script(layout: MapLayout) -> List[Tuple]:
+    """Everything the in-game screen shows: HUD, maze, messages, lives, fruits and pills."""
+    dot = COLOR_CODE_LOOKUP["dot"]
+    default = COLOR_CODE_LOOKUP["default"]
+    script: List[Tuple] = [
+        (TileState.clear, TILE_SPACE, dot),
+        (vid_color_text, (9, 0), default, "HIGH SCORE"),
+        (game_init_playfield, layout),
+        (vid_color_text, (9, 14), COLOR_CODE_LOOKUP["inky"], "PLAYER ONE"),
+        (vid_color_text, (11, 20), COLOR_CODE_LOOKUP["pacman"], "READY!"),
+        (vid_color_text, (11, 20), dot, "      "),
+        (vid_color_score, (6, 1), default, 98765432),
+        (vid_color_score, (16, 1), default, 0),
+        # Keep all digits inside the 28-column tile viewport so usage is recorded.
+        (vid_color_text, (18, 2), default, "0123456789"),
+    ]
+    for color_code in (COLOR_CODE_LOOKUP["pacman"], 0):
+        script.append((vid_draw_tile_quad, (2, 34), color_code, TILE_LIFE))
+    for tile_code, _, color_code in FRUIT_TILES_COLORS:
+        if tile_code:
+            script.append((vid_draw_tile_quad, (10, 0), color_code, tile_code))
+    for fruit in range(NUM_FRUITS):
+        script.append((vid_fruit_score, fruit))
+    for pos in PILL_POSITIONS:
+        script.append((TileState.color_only, pos, dot))
+        script.append((TileState.color_only, pos, 0))
+    script += [
+        (TileState.color_playfield, COLOR_CODE_LOOKUP["white_border"]),
+        (TileState.color_playfield, dot),
+        (vid_color_text, (9, 20), COLOR_CODE_LOOKUP["blinky"], "GAME  OVER"),
+    ]
+    return script
+
+
+def intro_screen_script(layout: MapLayout) -> List[Tuple]:
+    """The attract-mode character introduction screen."""
+    dot = COLOR_CODE_LOOKUP["dot"]
+    script: List[Tuple] = [
+        (TileState.clear, TILE_SPACE, COLOR_CODE_LOOKUP["default"]),
+        (vid_text, (3, 0), "1UP   HIGH SCORE   2UP"),
+        (vid_color_score, (6, 1), COLOR_CODE_LOOKUP["default"], 0),
+        (vid_text, (7, 5), "CHARACTER / NICKNAME"),
+        (vid_text, (3, 35), "CREDIT  0"),
+    ]
 
     names = ["-SHADOW", "-SPEEDY", "-BASHFUL", "-POKEY"]
     nicknames = ["BLINKY", "PINKY", "INKY", "CLYDE"]
+    ghost_tiles = TILE_GHOST + np.arange(6, dtype=np.uint8).reshape(3, 2)
     for i in range(4):
         color = 2 * i + 1
         y = 3 * i + 6
-        offsets = [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2)]
-        for dx, dy in offsets:
-            tile = TILE_GHOST + dy * 2 + dx
-            state.color_tile((4 + dx, y + dy), color, tile)
-        vid_color_text(state, (7, y + 1), color, names[i])
-        vid_color_text(state, (17, y + 1), color, nicknames[i])
-
-    state.color_tile((10, 24), COLOR_CODE_LOOKUP["dot"], TILE_DOT_CODE)
-    state.color_tile((10, 26), COLOR_CODE_LOOKUP["dot"], TILE_PILL)
-    vid_text(state, (12, 24), "10 \x5D\x5E\x5F")
-    vid_text(state, (12, 26), "50 \x5D\x5E\x5F")
-    vid_color_text(state, (3, 31), 3, "PRESS ANY KEY TO START!")
-    vid_color_text(state, (3, 31), 3, "                       ")
-
-    usage = {tile: set(colors) for tile, colors in state.usage.items() if colors}
+        script += [
+            (TileState.fill, (4, y, 2, 3), ghost_tiles, color),
+            (vid_color_text, (7, y + 1), color, names[i]),
+            (vid_color_text, (17, y + 1), color, nicknames[i]),
+        ]
+
+    script += [
+        (TileState.color_tile, (10, 24), dot, TILE_DOT_CODE),
+        (TileState.color_tile, (10, 26), dot, TILE_PILL),
+        (vid_text, (12, 24), "10 \x5D\x5E\x5F"),
+        (vid_text, (12, 26), "50 \x5D\x5E\x5F"),
+        (vid_color_text, (3, 31), 3, "PRESS ANY KEY TO START!"),
+        (vid_color_text, (3, 31), 3, "                       "),
+    ]
+    return script
+
+
+SCREEN_SCRIPTS = (game_screen_script, intro_screen_script)
+
+
+def simulate_tile_usage(layout: MapLayout) -> Dict[int, Set[int]]:
+    """Tile usage of the original arcade screens (pacman.c), with the maze taken from layout."""
+    usage = usage_bits_to_map(simulate_screens(build(layout) for build in SCREEN_SCRIPTS))
     ensure_default_character_usage(usage)
     return usage
 
 
+def _datalist_lines(text: str) -> List[Tuple[int, str]]:
+    lines = []
+    for raw in text.splitlines():
+        expanded = raw.expandtabs(4)
+        content = expanded.strip()
+        if content and not content.startswith("#"):
+            lines.append((len(expanded) - len(expanded.lstrip()), content))
+    return lines
+
+
+def _datalist_scalar(token: str) -> object:
+    if len(token) >= 2 and token[0] == token[-1] == '"':
+        return json.loads(token)
+    if token in ("true", "false"):
+        return token == "true"
+    for convert in (lambda t: int(t, 0), float):
+        try:
+            return convert(token)
+        except ValueError:
+            pass
+    return token
+
+
+def _datalist_block(lines: List[Tuple[int, str]], pos: int) -> Tuple[object, int]:
+    """Parse the map, list or `--` record list starting at lines[pos]; return it and the next position."""
+    indent, content = lines[pos]
+    if content == "--":
+        records: List[object] = []
+        while pos < len(lines) and lines[pos] == (indent, "--"):
+            record: object = {}
+            if pos + 1 < len(lines) and lines[pos + 1][0] >= indent and lines[pos + 1][1] != "--":
+                record, pos = _datalist_block(lines, pos + 1)
+            else:
+                pos += 1
+            records.append(record)
+        return records, pos
+
+    if content.startswith("-"):
+        items: List[object] = []
+        while pos < len(lines) and lines[pos][0] == indent and lines[pos][1].startswith("-"):
+            items.append(_datalist_scalar(lines[pos][1][1:].strip()))
+            pos += 1
+        return items, pos
+
+    result: Dict[str, object] = {}
+    while pos < len(lines) and lines[pos][0] == indent and lines[pos][1] != "--":
+        key, sep, value = lines[pos][1].partition(":")
+        if not sep:
+            raise ValueError(f"expected `key : value`, got {lines[pos][1]!r}")
+        pos += 1
+        if value.strip():
+            result[key.strip()] = _datalist_scalar(value.strip())
+        elif pos < len(lines) and lines[pos][0] > indent:
+            result[key.strip()], pos = _datalist_block(lines, pos)
+        else:
+            result[key.strip()] = {}
+    return result, pos
+
+
+def read_datalist(path: Path) -> object:
+    """
+    Read the subset of soluna's datalist format used under assets/: `key : value`
+    maps nested by indentation, `- value` lists, `--` separated records, and
+    quoted strings, decimal/hex integers, floats and booleans as scalars.
+    """
+    lines = _datalist_lines(path.read_text(encoding="utf-8"))
+    if not lines:
+        return {}
+    value, pos = _datalist_block(lines, 0)
+    if pos != len(lines):
+        raise ValueError(f"{path}: unexpected indentation at {lines[pos][1]!r}")
+    return value
+
+
+def load_map_layout(config_path: Path) -> MapLayout:
+    """Return the maze layout main.lua uses: cfg.map.display_offset_y and cfg.map.tiles."""
+    cfg = read_datalist(config_path)
+    if not isinstance(cfg, dict):
+        raise ValueError(f"{config_path} is not a datalist map.")
+    display, tile_map = cfg["display"], cfg["map"]
+    if (display["x"], display["y"]) != (DISPLAY_TILES_X, DISPLAY_TILES_Y):
+        raise ValueError(f"{config_path}: display must be {DISPLAY_TILES_X}x{DISPLAY_TILES_Y} tiles.")
+    top, rows = tile_map["display_offset_y"], list(tile_map["tiles"])
+    if any(len(row) != DISPLAY_TILES_X for row in rows) or top + len(rows) > DISPLAY_TILES_Y:
+        raise ValueError(f"{config_path}: map.tiles must be rows of {DISPLAY_TILES_X} characters inside the display.")
+    return top, rows
+
+
+def runtime_sprite_list(config_path: Path) -> Path:
+    """The sprite list main.lua loads: assets.sprites in config.dl (a path from the repository root), else sprites.dl."""
+    cfg = read_datalist(config_path)
+    name = cfg.get("assets", {}).get("sprites") if isinstance(cfg, dict) else None
+    return ASSET_DIR.parent / name if name else SPRITE_LIST_PATH
+
+
+TILE_LAYER_PATTERN = re.compile(r"tile_([0-9A-F]{2})_layer(\d)\.png$")
+SPRITE_LAYER_PATTERN = re.compile(r"sprite_(\d{2})_layer(\d)\.png$")
+DATALIST_REFERENCE = re.compile(r"^\$\((.+)\)$")
+
+
+def resolve_datalist_references(node: object, root: object) -> object:
+    """Replace the `"$(a.b.c)"` strings profiles.dl uses for templates with the node at that path of root."""
+    if isinstance(node, str):
+        match = DATALIST_REFERENCE.match(node)
+        if match is None:
+            return node
+        target = root
+        for key in match.group(1).split("."):
+            target = target[key]  # type: ignore[index]
+        return resolve_datalist_references(target, root)
+    if isinstance(node, dict):
+        return {key: resolve_datalist_references(value, root) for key, value in node.items()}
+    if isinstance(node, list):
+        return [resolve_datalist_references(value, root) for value in node]
+    return node
+
+
+def required_tile_layers(sprite_list: Path) -> Dict[int, Set[int]]:
+    """Return {tile code: {slots}} for every tile layer PNG that sprite_list references by filename."""
+    required: Dict[int, Set[int]] = defaultdict(set)
+    for entry in read_sprite_list(sprite_list):
+        match = TILE_LAYER_PATTERN.search(entry.get("filename", ""))
+        if match:
+            required[int(match.group(1), 16)].add(int(match.group(2)))
+    return dict(required)
+
+
+def visible_slots(colors: Iterable[int]) -> Set[int]:
+    """Palette slots that show a non-black color under at least one of the color codes."""
+    return {
+        slot
+        for color_code in colors
+        for slot in range(1, 4)
+        if rom_palette[((color_code & 0x1F) << 2) + slot] & 0x0F
+    }
+
+
+def config_tile_plan(layout: MapLayout, sprite_list: Path) -> Dict[int, Optional[Set[int]]]:
+    """
+    The tile layers the runtime can show: the (tile, color) pairs of the config.dl
+    maze plus the text glyph tiles, reduced to the slots those colors make visible,
+    plus every layer sprite_list names so soluna.load_sprites finds all its files.
+    """
+    state = TileState()
+    game_init_playfield(state, layout)
+    usage = state.usage_map()
+    ensure_default_character_usage(usage)
+
+    plan: Dict[int, Optional[Set[int]]] = {tile: visible_slots(colors) for tile, colors in usage.items()}
+    for tile, slots in required_tile_layers(sprite_list).items():
+        plan[tile] = (plan.get(tile) or set()) | slots
+    return plan
+
+
 DEFAULT_TEXT_CHARACTERS = tuple(chr(code) for code in range(ord('A'), ord('Z') + 1))
 DEFAULT_TEXT_DIGITS = tuple(chr(code) for code in range(ord('0'), ord('9') + 1))
 DEFAULT_TEXT_PUNCTUATION = ("!", "-")
@@ -393,12 +642,76 @@ def ensure_default_character_usage(tile_usage: Dict[int, Set[int]]) -> None:
 
 ASSET_DIR = CURRENT_DIR.parent.parent / "assets"
 SPRITE_OUTPUT_DIR = Path(f"{ASSET_DIR}/sprites")
-SPRITE_OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 TILE_OUTPUT_DIR = Path(f"{ASSET_DIR}/tiles")
-TILE_OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
 SCALE_FACTOR = 2  # Scaling factor (keep pixel art sharp with nearest-neighbor)
 SKIP_FULLY_TRANSPARENT = True  # Skip if the sprite image is fully transparent (all zeros)
+MASK_MODE = "RGBA"  # default layer mask mode; L and LA store the same mask as plain alpha
+MASK_CHANNELS = {"L": 1, "LA": 2, "RGBA": 4}
+
+# Atlas mode: sheets go to assets/atlas, and sprites_atlas.dl mirrors the hand-written
+# sprites.dl with every entry redirected into a sheet rect
+ATLAS_OUTPUT_DIR = Path(f"{ASSET_DIR}/atlas")
+SPRITE_LIST_PATH = Path(f"{ASSET_DIR}/sprites.dl")
+CONFIG_PATH = Path(f"{ASSET_DIR}/config.dl")
+ATLAS_LIST_PATH = Path(f"{ASSET_DIR}/sprites_atlas.dl")
+ATLAS_MAX_SIZE = 1024
+# Dedupe mode: alias table of skipped duplicate layers, and the sprite list rewritten to use it
+ALIAS_TABLE_PATH = Path(f"{ASSET_DIR}/sprite_aliases.json")
+DEDUP_LIST_PATH = Path(f"{ASSET_DIR}/sprites_dedup.dl")
+ATLAS_PADDING = 1  # transparent gutter between packed layers to avoid filtering bleed
+# Strip mode: one sheet per animation direction of the profiles.dl templates, frames left
+# to right in playback order, and strips.dl giving each as an anim8 grid
+PROFILES_PATH = Path(f"{ASSET_DIR}/profiles.dl")
+STRIP_OUTPUT_DIR = Path(f"{ASSET_DIR}/strips")
+STRIP_LIST_PATH = Path(f"{ASSET_DIR}/strips.dl")
+# Actor mode: every sprite of a profiles.dl template composited in full color under each
+# of its color codes into assets/actors, with actors.dl naming them <code>_<frame>
+ACTOR_OUTPUT_DIR = Path(f"{ASSET_DIR}/actors")
+ACTOR_LIST_PATH = Path(f"{ASSET_DIR}/actors.dl")
+ACTOR_COLOR_CODES = {
+    "pacman": ("pacman",),
+    "ghost": ("blinky", "pinky", "inky", "clyde", "eyes"),
+}
+# Frightened ghosts are not the body frames recolored but two ROM sprites of their own,
+# written as frightened_1/_2 and frightened_blink_1/_2
+FRIGHTENED_SPRITES = {"1": 0x1C, "2": 0x1D}
+FRIGHTENED_COLOR_CODES = ("frightened", "frightened_blink")
+FRIGHTENED_ANCHOR = {"x": "-0.5", "y": "-0.5"}
+
+# Incremental builds: outputs are only rewritten when their bytes change, and the
+# whole export is skipped when the manifest key (ROMs, tables, script, settings) matches
+MANIFEST_PATH = CURRENT_DIR / ".cache" / "gen_sprites_manifest.json"
+VARIANT_OUTPUT_DIR = CURRENT_DIR / "variants"  # default destination for --rom-dir batches
+ROOT_ROM_SET_NAME = "default"  # variant name of dumps lying directly in --rom-dir
+
+
+class PngProfile(NamedTuple):
+    """PNG encoder settings; every profile is pinned so equal pixels give equal bytes."""
+
+    compress_level: int  # zlib effort, 0-9
+    palette: bool  # store images with few colors losslessly as 1/2/4/8-bit palette or 1-bit gray (see compact_image)
+    optimize: bool  # also try the encoder's optimize pass and keep whichever output is smaller
+
+
+PNG_PROFILES = {
+    "fast": PngProfile(compress_level=6, palette=False, optimize=False),  # full-depth masks, as before
+    "compact": PngProfile(compress_level=9, palette=True, optimize=False),
+    "smallest": PngProfile(compress_level=9, palette=True, optimize=True),
+}
+PNG_PROFILE = "compact"
+LAYER_JOB_CHUNKSIZE = 16  # images handed to a pool worker per round trip
+
+# Static maze background baked from the playfield rows of game_init_playfield();
+# dots and pills are left out so the runtime can keep drawing them as overlays
+BAKE_SKIP_TILES = (TILE_DOT_CODE, TILE_PILL)
+BACKGROUND_SPRITE_NAME = "maze_background"
+BACKGROUND_SPRITE_ENTRY = {
+    "name": BACKGROUND_SPRITE_NAME,
+    "filename": f"sprites/{BACKGROUND_SPRITE_NAME}.png",
+    "x": "-0.5",
+    "y": "-0.5",
+}
 
 # additional sprite-layer PNGs for palette slots (indexed colors 1..3)
 SPRITE_LAYER_SUFFIX = {
@@ -415,16 +728,38 @@ def slot_suffix(slot_value: int) -> str:
     """Return a consistent filename suffix for the given palette slot."""
     return SPRITE_LAYER_SUFFIX.get(slot_value, f"layer{slot_value}")
 
-def load_rom_file(path: Path, expected_size: int) -> List[int]:
+def load_rom_file(path: Path, expected_size: int) -> memoryview:
+    """Memory-map a ROM dump read-only; the decoders index the returned view without copying."""
     try:
-        data = path.read_bytes()
+        with path.open("rb") as rom_file:
+            size = os.fstat(rom_file.fileno()).st_size
+            if size != expected_size:
+                raise ValueError(f"{path} has {size} bytes, but {expected_size} bytes are required.")
+            mapped = mmap.mmap(rom_file.fileno(), 0, access=mmap.ACCESS_READ)
     except FileNotFoundError as err:
         raise FileNotFoundError(f"Could not find {path}. Please provide the corresponding ROM binary first.") from err
-    if len(data) != expected_size:
-        raise ValueError(f"{path} has {len(data)} bytes, but {expected_size} bytes are required.")
-    return list(data)
+    return memoryview(mapped)
 
-def ensure_rom_lengths() -> None:
+def find_rom_sets(rom_dir: Path) -> List[Tuple[str, Path, Path]]:
+    """
+    List the (name, sprite ROM, tile ROM) variants under rom_dir: each direct
+    subdirectory that holds both rom_sprites.bin and rom_tiles.bin, named after it,
+    and rom_dir itself when it holds both, named ROOT_ROM_SET_NAME.
+    """
+    candidates = [(ROOT_ROM_SET_NAME, rom_dir)]
+    candidates += sorted((child.name, child) for child in rom_dir.iterdir() if child.is_dir())
+    rom_sets = []
+    for name, directory in candidates:
+        sprites_path = directory / ROM_SPRITES_PATH.name
+        tiles_path = directory / ROM_TILES_PATH.name
+        if sprites_path.is_file() and tiles_path.is_file():
+            rom_sets.append((name, sprites_path, tiles_path))
+    names = [name for name, _, _ in rom_sets]
+    if names.count(ROOT_ROM_SET_NAME) > 1:
+        raise ValueError(f"{rom_dir} and its {ROOT_ROM_SET_NAME}/ subdirectory both hold ROM dumps.")
+    return rom_sets
+
+def ensure_rom_lengths(rom_sprites: memoryview, rom_tiles: memoryview) -> None:
     if len(rom_sprites) != ROM_SPRITES_SIZE:
         raise ValueError(f"rom_sprites must be {ROM_SPRITES_SIZE} bytes long, got {len(rom_sprites)}.")
     if len(rom_sprites) % SPRITE_STRIDE != 0:
@@ -450,6 +785,18 @@ def decode_hwcolors() -> List[Tuple[int, int, int, int]]:
 
 HW_COLORS_RGBA = decode_hwcolors()
 
+def sprite_palette_rgba(color_code: int) -> List[Tuple[int, int, int, int]]:
+    """
+    build_palette_rgba() as the video hardware applies it: slots that map to
+    hardware color 0 (black) are transparent, e.g. the ghost body under "eyes".
+    """
+    base = (color_code & 0x1F) << 2
+    return [
+        (r, g, b, a if rom_palette[base + i] & 0x0F else 0)
+        for i, (r, g, b, a) in enumerate(build_palette_rgba(color_code))
+    ]
+
+
 def build_palette_rgba(color_code: int) -> List[Tuple[int, int, int, int]]:
     """
     Build a four-color palette (index 0 transparent) from the sprite color code,
@@ -467,135 +814,1134 @@ def build_palette_rgba(color_code: int) -> List[Tuple[int, int, int, int]]:
         palette.append((r, g, b, a))
     return palette
 
-def decode_sprite(sprite_index: int) -> List[List[int]]:
-    """Decode the sprite at sprite_index into a 16x16 index matrix."""
-    start = sprite_index * SPRITE_STRIDE
-    sprite_bytes = rom_sprites[start:start + SPRITE_STRIDE]
-
-    if len(sprite_bytes) != SPRITE_STRIDE:
-        raise ValueError(f"sprite {sprite_index} data is truncated.")
-
-    sprite = [[0] * SPRITE_WIDTH for _ in range(SPRITE_HEIGHT)]
-    for (x_off, y_off), block_offset in BLOCKS:
-        for tx in range(TILE_WIDTH):
-            byte_val = sprite_bytes[block_offset + (7 - tx)]
-            for ty in range(BLOCK_HEIGHT):
-                p_hi = (byte_val >> (7 - ty)) & 1
-                p_lo = (byte_val >> (3 - ty)) & 1
-                sprite[y_off + ty][x_off + tx] = (p_hi << 1) | p_lo
-    return sprite
-
-def decode_tile(tile_index: int) -> List[List[int]]:
-    """Decode the tile at tile_index into an 8x8 index matrix."""
-    start = tile_index * TILE_STRIDE
-    tile_bytes = rom_tiles[start:start + TILE_STRIDE]
-
-    if len(tile_bytes) != TILE_STRIDE:
-        raise ValueError(f"tile {tile_index} data is truncated.")
-
-    tile = [[0] * TILE_WIDTH for _ in range(TILE_HEIGHT)]
-    for block_idx, offset in enumerate((8, 0)):
-        y_off = block_idx * BLOCK_HEIGHT
+def _byte_pixel_lut() -> np.ndarray:
+    """Map every ROM byte to the four 2-bit pixel indices it stores (one per block row)."""
+    values = np.arange(256, dtype=np.uint8)[:, None]
+    rows = np.arange(BLOCK_HEIGHT, dtype=np.uint8)[None, :]
+    p_hi = (values >> (7 - rows)) & 1
+    p_lo = (values >> (3 - rows)) & 1
+    return (p_hi << 1) | p_lo
+
+BYTE_PIXEL_LUT = _byte_pixel_lut()  # shape (256, BLOCK_HEIGHT)
+
+def _block_gather(
+    blocks: Sequence[Tuple[Tuple[int, int], int]],
+    width: int,
+    height: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn a block layout table into per-pixel lookups: which byte of the image
+    holds the pixel, and which row of that byte's LUT entry it is.
+    """
+    byte_index = np.zeros((height, width), dtype=np.intp)
+    lut_row = np.zeros((height, width), dtype=np.intp)
+    rows = np.arange(BLOCK_HEIGHT)
+    for (x_off, y_off), block_offset in blocks:
         for tx in range(TILE_WIDTH):
-            byte_val = tile_bytes[offset + (7 - tx)]
-            for ty in range(BLOCK_HEIGHT):
-                p_hi = (byte_val >> (7 - ty)) & 1
-                p_lo = (byte_val >> (3 - ty)) & 1
-                tile[y_off + ty][tx] = (p_hi << 1) | p_lo
-    return tile
+            byte_index[y_off:y_off + BLOCK_HEIGHT, x_off + tx] = block_offset + (7 - tx)
+            lut_row[y_off:y_off + BLOCK_HEIGHT, x_off + tx] = rows
+    return byte_index, lut_row
+
+SPRITE_GATHER = _block_gather(BLOCKS, SPRITE_WIDTH, SPRITE_HEIGHT)
+TILE_GATHER = _block_gather(TILE_BLOCKS, TILE_WIDTH, TILE_HEIGHT)
+
+def decode_images(
+    rom: Union[bytes, memoryview],
+    stride: int,
+    gather: Tuple[np.ndarray, np.ndarray],
+) -> np.ndarray:
+    """Decode a whole ROM buffer into one contiguous (count, height, width) uint8 index array."""
+    data = np.frombuffer(rom, dtype=np.uint8)
+    if data.size % stride != 0:
+        raise ValueError(f"ROM length {data.size} is not a multiple of {stride}.")
+    byte_index, lut_row = gather
+    images = data.reshape(-1, stride)[:, byte_index]
+    return np.ascontiguousarray(BYTE_PIXEL_LUT[images, lut_row])
+
+class RomSet:
+    """
+    One pair of sprite/tile ROM dumps. The whole-ROM index arrays are decoded on
+    first use and kept, so repeated exports from the same object decode once.
+    """
+
+    def __init__(self, rom_sprites: Union[bytes, memoryview], rom_tiles: Union[bytes, memoryview]) -> None:
+        self.rom_sprites = memoryview(rom_sprites)
+        self.rom_tiles = memoryview(rom_tiles)
+        ensure_rom_lengths(self.rom_sprites, self.rom_tiles)
+        self._sprite_pixels: Optional[np.ndarray] = None
+        self._tile_pixels: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, sprites_path: Path = ROM_SPRITES_PATH, tiles_path: Path = ROM_TILES_PATH) -> RomSet:
+        """Memory-map both dumps (see load_rom_file)."""
+        return cls(load_rom_file(sprites_path, ROM_SPRITES_SIZE), load_rom_file(tiles_path, ROM_TILES_SIZE))
+
+    def sprite_sheet(self) -> np.ndarray:
+        """Return every sprite as a (num_sprites, 16, 16) index array."""
+        if self._sprite_pixels is None:
+            self._sprite_pixels = decode_images(self.rom_sprites, SPRITE_STRIDE, SPRITE_GATHER)
+        return self._sprite_pixels
+
+    def tile_sheet(self) -> np.ndarray:
+        """Return every tile as a (num_tiles, 8, 8) index array."""
+        if self._tile_pixels is None:
+            self._tile_pixels = decode_images(self.rom_tiles, TILE_STRIDE, TILE_GATHER)
+        return self._tile_pixels
+
+    def decode_sprite(self, sprite_index: int) -> np.ndarray:
+        """Decode the sprite at sprite_index into a 16x16 index matrix (a view into sprite_sheet())."""
+        sheet = self.sprite_sheet()
+        if not 0 <= sprite_index < len(sheet):
+            raise ValueError(f"sprite {sprite_index} data is truncated.")
+        return sheet[sprite_index]
+
+    def decode_tile(self, tile_index: int) -> np.ndarray:
+        """Decode the tile at tile_index into an 8x8 index matrix (a view into tile_sheet())."""
+        sheet = self.tile_sheet()
+        if not 0 <= tile_index < len(sheet):
+            raise ValueError(f"tile {tile_index} data is truncated.")
+        return sheet[tile_index]
 
 def is_sprite_fully_transparent(pixels: Iterable[int]) -> bool:
-    return all(p == 0 for p in pixels)
+    return not np.any(np.asarray(pixels))
 
-def pixels_to_slot_mask(
-    pixel_rows: Sequence[Sequence[int]],
-    slot_value: int,
+def used_slot_values(pixels: np.ndarray) -> List[int]:
+    """Return the sorted non-zero palette slots present in an index matrix."""
+    return [int(value) for value in np.unique(pixels) if value]
+
+def slot_masks(
+    pixel_rows: Union[np.ndarray, Sequence[Sequence[int]]],
+    slots: Optional[Sequence[int]] = None,
     scale: int = 1,
-) -> Image.Image:
-    """Create a white mask (RGBA) where pixels == slot_value, transparent otherwise."""
-    height = len(pixel_rows)
-    if height == 0:
+    mode: str = "RGBA",
+) -> Dict[int, Image.Image]:
+    """
+    Build the mask of every slot in one pass over the index matrix (default: all
+    used slots). Each mask is 0xFF in every channel where pixels == slot and 0
+    elsewhere, so RGBA gives white/transparent and L/LA give plain alpha masks.
+    The integer upscale happens on the byte buffer before the images are created.
+    """
+    from PIL import Image
+
+    if mode not in MASK_CHANNELS:
+        raise ValueError(f"Unsupported mask mode {mode!r}; expected one of {', '.join(MASK_CHANNELS)}.")
+    pixels = np.asarray(pixel_rows, dtype=np.uint8)
+    if pixels.ndim != 2 or pixels.size == 0:
         raise ValueError("Pixel data is empty.")
-    width = len(pixel_rows[0])
+    if slots is None:
+        slots = used_slot_values(pixels)
+    if not slots:
+        return {}
 
-    flat_pixels = []
-    for row in pixel_rows:
-        for value in row:
-            if value == slot_value:
-                flat_pixels.append((0xFF, 0xFF, 0xFF, 0xFF))
-            else:
-                flat_pixels.append((0x00, 0x00, 0x00, 0x00))
+    slot_values = np.asarray(slots, dtype=np.uint8)[:, None, None]
+    stack = (pixels[None, :, :] == slot_values).view(np.uint8) * np.uint8(0xFF)
+    if scale > 1:
+        stack = stack.repeat(scale, axis=1).repeat(scale, axis=2)
+    _, height, width = stack.shape
+    channels = MASK_CHANNELS[mode]
+    if channels > 1:
+        stack = np.repeat(stack[..., None], channels, axis=3)
 
-    img = Image.new("RGBA", (width, height))
-    img.putdata(flat_pixels)
+    masks: Dict[int, Image.Image] = {}
+    for slot_value, plane in zip(slots, stack):
+        masks[slot_value] = Image.frombuffer(mode, (width, height), np.ascontiguousarray(plane), "raw", mode, 0, 1)
+    return masks
 
-    if scale > 1:
-        img = img.resize((width * scale, height * scale), Image.NEAREST)
-    return img
+def pixels_to_slot_mask(
+    pixel_rows: Union[np.ndarray, Sequence[Sequence[int]]],
+    slot_value: int,
+    scale: int = 1,
+    mode: str = "RGBA",
+) -> Image.Image:
+    """Create a white mask (RGBA, or L/LA alpha) where pixels == slot_value, transparent otherwise."""
+    return slot_masks(pixel_rows, [slot_value], scale=scale, mode=mode)[slot_value]
 
 # ---------------------------------------------------------------------------
 # 4) Export logic
 # ---------------------------------------------------------------------------
 
-def export_sprites() -> int:
-    num_sprites = len(rom_sprites) // SPRITE_STRIDE
-    exported_layers = 0
-    for sprite_idx in range(num_sprites):
-        sprite_pixels = decode_sprite(sprite_idx)
-        flat_indices = [p for row in sprite_pixels for p in row]
+# output directory, file stem, decoded index matrix, mask mode, allowed slots (None = all) and PNG profile of one image
+LayerJob = Tuple[Path, str, np.ndarray, str, Optional[Set[int]], str]
+# output path, mask image and its encoded PNG bytes
+Layer = Tuple[Path, "Image.Image", bytes]
 
-        if SKIP_FULLY_TRANSPARENT and is_sprite_fully_transparent(flat_indices):
-            continue
 
-        used_slots = sorted({value for value in flat_indices if value})
-        if not used_slots:
-            continue
+def compact_image(img: Image.Image) -> Image.Image:
+    """
+    Re-express img in the smallest PNG color type that decodes to the same pixels:
+    0/0xFF L masks and white/transparent RGBA masks become 1-bit grayscale (the
+    latter with black as the transparent value), and other RGBA images with at
+    most 256 colors (the baked background) become palette images with per-entry
+    alpha, whose bit depth follows the palette size. Others are returned as is.
+    """
+    from PIL import Image
+
+    if img.mode == "L":
+        pixels = np.asarray(img)
+        opaque = pixels == 0xFF
+        return Image.fromarray(opaque) if (opaque | (pixels == 0)).all() else img
+    if img.mode != "RGBA":
+        return img
+    packed = np.ascontiguousarray(np.asarray(img)).view(np.uint32)[..., 0]
+    opaque = packed == 0xFFFFFFFF
+    if (opaque | (packed == 0)).all():
+        # white/transparent mask: 1-bit gray with black as the transparent value
+        out = Image.fromarray(opaque)
+        if not opaque.all():
+            out.info["transparency"] = 0
+        return out
+    colors, index = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return img
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    indexed = np.ascontiguousarray(index.reshape(packed.shape).astype(np.uint8))
+    out = Image.frombuffer("P", img.size, indexed, "raw", "P", 0, 1)
+    out.putpalette(palette[:, :3].tobytes())
+    if (palette[:, 3] != 0xFF).any():
+        out.info["transparency"] = palette[:, 3].tobytes()
+    return out
+
+
+def full_depth_image(img: Image.Image) -> Image.Image:
+    """Undo compact_image on a loaded PNG: 1-bit back to L (RGBA when it has a transparent value), palette back to RGBA."""
+    if img.mode == "1":
+        return img.convert("RGBA" if "transparency" in img.info else "L")
+    if img.mode == "P":
+        return img.convert("RGBA")
+    return img
 
-        for slot_value in used_slots:
-            suffix = slot_suffix(slot_value)
-            mask = pixels_to_slot_mask(sprite_pixels, slot_value, scale=SCALE_FACTOR)
-            mask_filename = SPRITE_OUTPUT_DIR / f"sprite_{sprite_idx:02d}_{suffix}.png"
-            mask.save(mask_filename)
-            exported_layers += 1
-    return exported_layers
 
+def encode_png(img: Image.Image, profile: str = PNG_PROFILE) -> bytes:
+    """Encode img as PNG with the pinned settings of profile and no metadata, so equal pixels give equal bytes."""
+    settings = PNG_PROFILES[profile]
+    if settings.palette:
+        img = compact_image(img)
+    encoded = []
+    for optimize in (False, True) if settings.optimize else (False,):
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", compress_level=settings.compress_level, optimize=optimize)
+        encoded.append(buffer.getvalue())
+    return min(encoded, key=len)
+
+
+def sprite_jobs(
+    rom: RomSet, output_dir: Path = SPRITE_OUTPUT_DIR, mode: str = MASK_MODE, profile: str = PNG_PROFILE
+) -> List[LayerJob]:
+    return [
+        (output_dir, f"sprite_{idx:02d}", pixels, mode, None, profile) for idx, pixels in enumerate(rom.sprite_sheet())
+    ]
+
+
+def tile_jobs(
+    rom: RomSet,
+    tile_slots: Dict[int, Optional[Set[int]]],
+    output_dir: Path = TILE_OUTPUT_DIR,
+    mode: str = MASK_MODE,
+    profile: str = PNG_PROFILE,
+) -> List[LayerJob]:
+    return [
+        (output_dir, f"tile_{idx:02X}", pixels, mode, tile_slots[idx], profile)
+        for idx, pixels in enumerate(rom.tile_sheet())
+        if idx in tile_slots
+    ]
+
+
+def render_layers(job: LayerJob) -> List[Layer]:
+    """Build and encode the mask of every palette slot used by one image (runs in pool workers)."""
+    output_dir, stem, pixels, mode, allowed_slots, profile = job
+    if SKIP_FULLY_TRANSPARENT and is_sprite_fully_transparent(pixels):
+        return []
+
+    slots = used_slot_values(pixels)
+    if allowed_slots is not None:
+        slots = [slot for slot in slots if slot in allowed_slots]
+    layers: List[Layer] = []
+    for slot_value, mask in slot_masks(pixels, slots, scale=SCALE_FACTOR, mode=mode).items():
+        suffix = slot_suffix(slot_value)
+        layers.append((output_dir / f"{stem}_{suffix}.png", mask, encode_png(mask, profile)))
+    return layers
+
+
+def run_layer_jobs(jobs: Sequence[LayerJob], pool: Optional[Executor] = None) -> Iterator[Layer]:
+    """Render jobs in order, fanning them out across pool when one is given."""
+    if pool is None:
+        results: Iterable[List[Layer]] = map(render_layers, jobs)
+    else:
+        results = pool.map(render_layers, jobs, chunksize=LAYER_JOB_CHUNKSIZE)
+    for layers in results:
+        yield from layers
+
+
+class OutputWriter:
+    """
+    Write generated files only when their bytes differ from what is on disk
+    (leaving mtimes of unchanged files alone) and record a digest of every
+    output, keyed by its path relative to root, for the build manifest.
+    PNGs are encoded with png_profile.
+    """
+
+    def __init__(self, root: Path = ASSET_DIR, png_profile: str = PNG_PROFILE) -> None:
+        self.root = root
+        self.png_profile = png_profile
+        self.digests: Dict[str, str] = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def write(self, path: Path, data: bytes) -> None:
+        self.digests[path.relative_to(self.root).as_posix()] = hashlib.sha256(data).hexdigest()
+        try:
+            if path.read_bytes() == data:
+                self.unchanged += 1
+                metrics.count("files_unchanged")
+                return
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(exist_ok=True, parents=True)
+        path.write_bytes(data)
+        self.written += 1
+        metrics.count("files_written")
+        metrics.count("bytes_written", len(data))
+
+    def write_png(self, path: Path, img: Image.Image) -> None:
+        self.write(path, encode_png(img, self.png_profile))
+
+    def write_layer(self, layer: Layer) -> None:
+        path, _, data = layer
+        self.write(path, data)
+
+
+class LayerAliases:
+    """
+    Content-hash deduplication of layer PNGs: the first layer with given bytes
+    becomes canonical and every later identical layer is recorded as an alias
+    of it, and only written as well with keep_files (needed while the runtime
+    loads a sprite list that names the aliased files).
+    """
 
-def export_tiles(tile_usage: Dict[int, Set[int]]) -> int:
-    num_tiles = len(rom_tiles) // TILE_STRIDE
+    def __init__(self, keep_files: bool = False) -> None:
+        self.canonical: Dict[str, str] = {}
+        self.aliases: Dict[str, str] = {}
+        self.keep_files = keep_files
+
+    def add(self, name: str, data: bytes) -> Optional[str]:
+        """Register a layer; return its canonical name if it duplicates an earlier one, else None."""
+        canonical = self.canonical.setdefault(hashlib.sha256(data).hexdigest(), name)
+        if canonical == name:
+            return None
+        self.aliases[name] = canonical
+        return canonical
+
+    def write(self, writer: OutputWriter, path: Path) -> None:
+        """Write the alias table as JSON {alias: canonical}, paths relative to the writer root."""
+        writer.write(path, (json.dumps(dict(sorted(self.aliases.items())), indent=2) + "\n").encode("utf-8"))
+
+
+def save_layers(
+    layers: Iterable[Layer],
+    writer: OutputWriter,
+    collected: Optional[Dict[str, Image.Image]] = None,
+    aliases: Optional[LayerAliases] = None,
+) -> int:
+    """
+    Write every layer PNG. When collected is given, also keep each mask keyed by
+    its path relative to the writer root (the form sprites.dl uses) for atlas packing.
+    With aliases, layers identical to one already written are only recorded as
+    aliases. Returns the number of layers, written or aliased.
+    """
     exported_layers = 0
-    for tile_idx in range(num_tiles):
-        if tile_idx not in tile_usage:
+    for layer in layers:
+        path, mask, data = layer
+        name = path.relative_to(writer.root).as_posix()
+        exported_layers += 1
+        if aliases is not None and aliases.add(name, data) is not None:
+            metrics.count("layers_aliased")
+            if aliases.keep_files:
+                writer.write_layer(layer)
+            continue
+        writer.write_layer(layer)
+        if collected is not None:
+            collected[name] = mask
+    return exported_layers
+
+
+def count_transparent_jobs(counter: str, jobs: Sequence[LayerJob]) -> None:
+    """Count the jobs render_layers will skip; done here because workers cannot update metrics."""
+    if SKIP_FULLY_TRANSPARENT:
+        metrics.count(counter, sum(is_sprite_fully_transparent(job[2]) for job in jobs))
+
+
+def export_sprites(
+    rom: RomSet,
+    writer: OutputWriter,
+    collected: Optional[Dict[str, Image.Image]] = None,
+    pool: Optional[Executor] = None,
+    mode: str = MASK_MODE,
+    aliases: Optional[LayerAliases] = None,
+) -> int:
+    jobs = sprite_jobs(rom, writer.root / SPRITE_OUTPUT_DIR.name, mode, writer.png_profile)
+    count_transparent_jobs("sprites_skipped_transparent", jobs)
+    return save_layers(run_layer_jobs(jobs, pool), writer, collected, aliases)
+
+
+def export_tiles(
+    rom: RomSet,
+    tile_slots: Dict[int, Optional[Set[int]]],
+    writer: OutputWriter,
+    collected: Optional[Dict[str, Image.Image]] = None,
+    pool: Optional[Executor] = None,
+    mode: str = MASK_MODE,
+    aliases: Optional[LayerAliases] = None,
+) -> int:
+    jobs = tile_jobs(rom, tile_slots, writer.root / TILE_OUTPUT_DIR.name, mode, writer.png_profile)
+    count_transparent_jobs("tiles_skipped_transparent", jobs)
+    return save_layers(run_layer_jobs(jobs, pool), writer, collected, aliases)
+
+def static_playfield(layout: MapLayout) -> TileState:
+    """Return the video/color RAM right after game_init_playfield(), i.e. the maze as drawn at round start."""
+    state = TileState()
+    state.clear(TILE_SPACE, COLOR_CODE_LOOKUP["dot"])
+    game_init_playfield(state, layout)
+    return state
+
+
+def bake_playfield(rom: RomSet, state: TileState, layout: MapLayout, scale: int = 1) -> Image.Image:
+    """
+    Composite the playfield rows of state into one RGBA image, coloring each tile
+    with sprite_palette_rgba() of its color code, so slots that map to hardware
+    black stay transparent as in the tinted tile layers. Dynamic tiles (dots and pills,
+    which get eaten or blink) are left transparent so they can stay overlays.
+    """
+    from PIL import Image
+
+    top, map_rows = layout
+    rows = slice(top, top + len(map_rows))
+    video = np.array(state.video[rows], dtype=np.uint8)
+    color = np.array(state.color[rows], dtype=np.uint8) & 0x1F
+    palettes = np.array([sprite_palette_rgba(code) for code in range(32)], dtype=np.uint8)
+
+    # (rows, cols, 8, 8) tile indices -> (rows, cols, 8, 8, 4) colors
+    rgba = palettes[color[:, :, None, None], rom.tile_sheet()[video]]
+    rgba[np.isin(video, BAKE_SKIP_TILES)] = 0
+    tile_rows, tile_cols = video.shape
+    image = rgba.transpose(0, 2, 1, 3, 4).reshape(tile_rows * TILE_HEIGHT, tile_cols * TILE_WIDTH, 4)
+    if scale > 1:
+        image = image.repeat(scale, axis=0).repeat(scale, axis=1)
+    height, width, _ = image.shape
+    return Image.frombuffer("RGBA", (width, height), np.ascontiguousarray(image), "raw", "RGBA", 0, 1)
+
+
+def export_background(
+    rom: RomSet,
+    writer: OutputWriter,
+    layout: MapLayout,
+    collected: Optional[Dict[str, Image.Image]] = None,
+) -> Path:
+    """Write the baked maze background next to the sprite layers and return its path."""
+    path = writer.root / SPRITE_OUTPUT_DIR.name / f"{BACKGROUND_SPRITE_NAME}.png"
+    image = bake_playfield(rom, static_playfield(layout), layout, scale=SCALE_FACTOR)
+    writer.write_png(path, image)
+    if collected is not None:
+        collected[path.relative_to(writer.root).as_posix()] = image
+    return path
+
+
+def check_sprite_entry(sprite_list: Path, entry: Dict[str, str]) -> None:
+    """Exit with a message unless the hand-written sprite_list has a record with entry's name and filename."""
+    for existing in read_sprite_list(sprite_list):
+        if existing.get("name") == entry["name"]:
+            if existing.get("filename") != entry["filename"]:
+                raise SystemExit(
+                    f"{sprite_list}: {entry['name']} must use filename {entry['filename']}, "
+                    f"not {existing.get('filename')}."
+                )
+            return
+    record = "".join(f"\n    {key} : {value}" for key, value in entry.items())
+    raise SystemExit(f"{sprite_list} has no {entry['name']} entry; add this record:\n    --{record}")
+
+# ---------------------------------------------------------------------------
+# 5) Atlas packing and animation strips
+# ---------------------------------------------------------------------------
+
+# sheet index, x, y, width, height inside the sheet
+AtlasRect = Tuple[int, int, int, int, int]
+
+
+# one sprites.dl record: verbatim values, or {key: value} for a nested block such as rect
+SpriteEntry = Dict[str, Union[str, Dict[str, str]]]
+
+
+def read_sprite_list(path: Path) -> List[SpriteEntry]:
+    """
+    Parse the `--`-separated records of a sprites.dl file, keeping values verbatim.
+    Indented lines under a key without a value (the `rect :` block of
+    sprites_atlas.dl) become a nested {key: value} map.
+    """
+    entries: List[SpriteEntry] = []
+    current: Optional[SpriteEntry] = None
+    block: Optional[Dict[str, str]] = None
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line == "--":
+            current, block = {}, None
+            entries.append(current)
             continue
-        tile_pixels = decode_tile(tile_idx)
-        flat_indices = [p for row in tile_pixels for p in row]
-        if SKIP_FULLY_TRANSPARENT and is_sprite_fully_transparent(flat_indices):
+        key, sep, value = line.partition(":")
+        if not sep or current is None:
+            raise ValueError(f"{path}: unexpected line {raw!r}")
+        key, value = key.strip(), value.strip()
+        if raw[:1].isspace():
+            if block is None:
+                raise ValueError(f"{path}: unexpected indentation at {raw!r}")
+            block[key] = value
+        elif value:
+            current[key], block = value, None
+        else:
+            block = current[key] = {}
+    return entries
+
+
+def _next_pow2(value: int) -> int:
+    return 1 << max(0, value - 1).bit_length()
+
+
+def _shelf_pack(
+    names: Sequence[str],
+    sizes: Dict[str, Tuple[int, int]],
+    side: int,
+    padding: int,
+) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """Place images left to right on shelves of a side x side sheet; return placements and leftovers."""
+    placed: Dict[str, Tuple[int, int]] = {}
+    leftover: List[str] = []
+    x = y = shelf_height = 0
+    for name in names:
+        width, height = sizes[name]
+        if x + width > side:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        if width > side or y + height > side:
+            leftover.append(name)
             continue
+        placed[name] = (x, y)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return placed, leftover
 
-        used_slots = sorted({value for value in flat_indices if value})
-        if not used_slots:
+
+def pack_atlas(
+    sizes: Dict[str, Tuple[int, int]],
+    max_size: int,
+    padding: int,
+) -> Tuple[List[int], Dict[str, AtlasRect]]:
+    """
+    Shelf-pack images (tallest first) into square power-of-two sheets. Each sheet
+    is the smallest power of two that holds the remaining images, capped at max_size.
+    Returns the sheet sizes and the rect of every image.
+    """
+    remaining = sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name))
+    for name in remaining:
+        if max(sizes[name]) > max_size:
+            raise ValueError(f"{name} is larger than the {max_size}px atlas sheet.")
+
+    sheets: List[int] = []
+    rects: Dict[str, AtlasRect] = {}
+    while remaining:
+        side = _next_pow2(max(max(sizes[name]) for name in remaining))
+        placed, leftover = _shelf_pack(remaining, sizes, side, padding)
+        while leftover and side < max_size:
+            side *= 2
+            placed, leftover = _shelf_pack(remaining, sizes, side, padding)
+        for name, (x, y) in placed.items():
+            rects[name] = (len(sheets), x, y, *sizes[name])
+        sheets.append(side)
+        remaining = leftover
+    return sheets, rects
+
+
+def rewrite_sprite_list(
+    sprite_list: Path,
+    retarget: Callable[[str], Optional[Tuple[str, Optional[Tuple[int, int, int, int]]]]],
+) -> bytes:
+    """
+    Copy sprite_list, letting retarget map each entry's filename to a new
+    (filename, optional x/y/w/h rect); entries it returns None for are kept as is.
+    """
+    lines: List[str] = []
+    for entry in read_sprite_list(sprite_list):
+        target = retarget(str(entry.get("filename", "")))
+        lines.append("--")
+        for key, value in entry.items():
+            if target is not None and target[1] is not None and key == "rect":
+                continue
+            if key == "filename" and target is not None:
+                value = target[0]
+            if isinstance(value, dict):
+                lines.append(f"{key} :")
+                lines.extend(f"    {child} : {child_value}" for child, child_value in value.items())
+            else:
+                lines.append(f"{key} : {value}")
+        if target is not None and target[1] is not None:
+            lines.append("rect :")
+            lines.extend(f"    {key} : {value}" for key, value in zip("xywh", target[1]))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def export_atlas(
+    layers: Dict[str, Image.Image],
+    writer: OutputWriter,
+    sprite_list: Path,
+    output_list: Path,
+    max_size: int = ATLAS_MAX_SIZE,
+    padding: int = ATLAS_PADDING,
+    aliases: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Pack every collected layer into atlas sheets and write a copy of sprite_list
+    whose entries point at the sheets with a rect each; entries naming an alias
+    share the rect of its canonical layer. Layers are packed per image mode, so
+    the colored RGBA background never shares a sheet with L/LA masks. Returns
+    the sheet count.
+    """
+    from PIL import Image
+
+    aliases = aliases or {}
+    by_mode: Dict[str, Dict[str, Image.Image]] = defaultdict(dict)
+    for name, img in layers.items():
+        by_mode[img.mode][name] = img
+
+    sheet_names: List[str] = []
+    rects: Dict[str, AtlasRect] = {}
+    for mode, group in sorted(by_mode.items()):
+        sheets, group_rects = pack_atlas({name: img.size for name, img in group.items()}, max_size, padding)
+        first = len(sheet_names)
+        images = [Image.new(mode, (side, side)) for side in sheets]
+        for name, (sheet, x, y, width, height) in group_rects.items():
+            images[sheet].paste(group[name], (x, y))
+            rects[name] = (first + sheet, x, y, width, height)
+        for img in images:
+            sheet_names.append(f"{ATLAS_OUTPUT_DIR.name}/atlas_{len(sheet_names)}.png")
+            writer.write_png(writer.root / sheet_names[-1], img)
+
+    def retarget(filename: str) -> Optional[Tuple[str, Optional[Tuple[int, int, int, int]]]]:
+        rect = rects.get(aliases.get(filename, filename))
+        if rect is None:
+            print(f"Atlas: {filename} was not exported, keeping the loose file")
+            return None
+        sheet, x, y, width, height = rect
+        return sheet_names[sheet], (x, y, width, height)
+
+    writer.write(output_list, rewrite_sprite_list(sprite_list, retarget))
+    return len(sheet_names)
+
+
+class StripAnimation(NamedTuple):
+    """One direction of a profiles.dl template animation, as gameplay/spawn.lua builds it."""
+
+    name: str  # <template>_<animation>_<direction>
+    template: str
+    animation: str
+    frames: Tuple[str, ...]  # sprites.dl names in playback order
+    duration: float
+    sx: int
+    sy: int
+    color: Optional[int]
+
+
+def animation_strips(profiles_path: Path) -> List[StripAnimation]:
+    """Collect every direction of every template animation (a map with `dirs`) in profiles_path."""
+    profiles = read_datalist(profiles_path)
+    templates = resolve_datalist_references(profiles, profiles)["templates"]  # type: ignore[index]
+    strips: List[StripAnimation] = []
+    for template, parts in templates.items():
+        for animation, anim in parts.items():
+            if not isinstance(anim, dict) or "dirs" not in anim:
+                continue
+            for direction, spec in anim["dirs"].items():
+                strips.append(
+                    StripAnimation(
+                        f"{template}_{animation}_{direction}",
+                        template,
+                        animation,
+                        tuple(spec["frames"]),
+                        anim.get("duration", 1),
+                        spec.get("sx", 1),
+                        spec.get("sy", 1),
+                        anim.get("color"),
+                    )
+                )
+    return strips
+
+
+def export_strips(
+    rom: RomSet,
+    writer: OutputWriter,
+    sprite_list: Path,
+    profiles_path: Path,
+    output_list: Path,
+    mode: str = MASK_MODE,
+) -> int:
+    """
+    Write one horizontal strip per distinct frame sequence of animation_strips():
+    each sprite layer the sequence uses once, left to right in first-use order, so
+    repeated frames (pacman_r_1 in r_1, r_2, r_1) share a column and mirrored
+    directions share their source strip. output_list records every direction as an
+    anim8 grid: frame size, column count and the 1-based columns in playback order,
+    plus the duration, sx/sy and color spawn.lua applies. Returns the strip count.
+    """
+    from PIL import Image
+
+    entries = {entry["name"]: entry for entry in read_sprite_list(sprite_list)}
+    sheet = rom.sprite_sheet()
+    masks: Dict[str, Image.Image] = {}
+    strip_names: Dict[Tuple[str, ...], str] = {}
+    lines: List[str] = []
+    for strip in animation_strips(profiles_path):
+        missing = [frame for frame in strip.frames if frame not in entries]
+        if missing:
+            print(f"Strips: {strip.name} uses {', '.join(missing)}, which {sprite_list.name} does not list; skipped")
+            continue
+        filenames = [entries[frame]["filename"] for frame in strip.frames]
+        columns = tuple(dict.fromkeys(filenames))
+        for filename in columns:
+            match = SPRITE_LAYER_PATTERN.search(filename)
+            if match is None:
+                raise ValueError(f"{strip.name}: {filename} is not a sprite layer.")
+            if filename not in masks:
+                masks[filename] = pixels_to_slot_mask(
+                    sheet[int(match.group(1))], int(match.group(2)), scale=SCALE_FACTOR, mode=mode
+                )
+
+        name = strip_names.get(columns)
+        if name is None:
+            name = strip_names[columns] = f"{STRIP_OUTPUT_DIR.name}/{strip.name}.png"
+            width, height = masks[columns[0]].size
+            image = Image.new(mode, (width * len(columns), height))
+            for column, filename in enumerate(columns):
+                image.paste(masks[filename], (column * width, 0))
+            writer.write_png(writer.root / name, image)
+
+        first = entries[strip.frames[0]]
+        width, height = masks[columns[0]].size
+        lines += ["--", f"name : {strip.name}", f"filename : {name}", f"x : {first.get('x', 0)}", f"y : {first.get('y', 0)}"]
+        lines += [f"frame_width : {width}", f"frame_height : {height}", f"columns : {len(columns)}"]
+        lines += [f"duration : {strip.duration}", f"sx : {strip.sx}", f"sy : {strip.sy}"]
+        if strip.color is not None:
+            lines.append(f"color : 0x{strip.color:06X}")
+        lines.append("frames :")
+        lines.extend(f"  - {columns.index(filename) + 1}" for filename in filenames)
+        lines.append("sprites :")
+        lines.extend(f'  - "{frame}"' for frame in strip.frames)
+
+    writer.write(output_list, ("\n".join(lines) + "\n").encode("utf-8"))
+    return len(strip_names)
+
+
+def sprite_layer_index(filename: str) -> Optional[int]:
+    """Return the ROM sprite index of a sprites/sprite_NN_layerK.png filename, or None for other files."""
+    match = SPRITE_LAYER_PATTERN.search(filename)
+    return int(match.group(1)) if match else None
+
+
+def actor_frames(sprite_list: Path, profiles_path: Path) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Map each template of ACTOR_COLOR_CODES to {frame label: sprites.dl entry} over the
+    frames its animations use. The label drops the template and animation prefix, so
+    ghost_eye_white_r_1 and ghost_body_r_1 (layers of one sprite) are both r_1, and a
+    frame named like its template (pacman) gets an empty label.
+    """
+    entries = {entry["name"]: entry for entry in read_sprite_list(sprite_list)}
+    frames: Dict[str, Dict[str, Dict[str, str]]] = {template: {} for template in ACTOR_COLOR_CODES}
+    for strip in animation_strips(profiles_path):
+        if strip.template not in frames:
             continue
+        for frame in strip.frames:
+            entry = entries.get(frame, {})
+            index = sprite_layer_index(entry.get("filename", ""))
+            if index is None:
+                raise ValueError(f"{strip.name}: {frame} is not a sprite layer in {sprite_list.name}.")
+            label = "" if frame == strip.template else frame
+            for prefix in (f"{strip.template}_{strip.animation}_", f"{strip.template}_"):
+                if frame.startswith(prefix):
+                    label = frame[len(prefix):]
+                    break
+            known = frames[strip.template].setdefault(label, entry)
+            if sprite_layer_index(known["filename"]) != index:
+                raise ValueError(f"{strip.template}: frame {label} names two different sprites.")
+    return frames
+
+
+def export_actors(
+    rom: RomSet,
+    writer: OutputWriter,
+    sprite_list: Path,
+    profiles_path: Path,
+    output_list: Path,
+) -> int:
+    """
+    Composite every actor_frames() sprite under each color code ACTOR_COLOR_CODES lists
+    for its template, and FRIGHTENED_SPRITES under FRIGHTENED_COLOR_CODES: one RGBA
+    image colored with sprite_palette_rgba(), so the runtime draws an actor with one
+    sprite instead of one tinted mask per slot. output_list is a sprites.dl-style list
+    naming each <code>_<label> (just <code> for an empty label). Returns the number of images.
+    """
+    from PIL import Image
+
+    # (color codes, {label: (sprite index, sprites.dl entry with the x/y anchor)})
+    groups: List[Tuple[Sequence[str], Dict[str, Tuple[int, Dict[str, str]]]]] = []
+    for template, frames in actor_frames(sprite_list, profiles_path).items():
+        indexed = {label: (sprite_layer_index(entry["filename"]), entry) for label, entry in frames.items()}
+        groups.append((ACTOR_COLOR_CODES[template], indexed))  # type: ignore[arg-type]
+    frightened = {label: (index, FRIGHTENED_ANCHOR) for label, index in FRIGHTENED_SPRITES.items()}
+    groups.append((FRIGHTENED_COLOR_CODES, frightened))
+
+    sheet = rom.sprite_sheet()
+    written: Set[str] = set()
+    lines: List[str] = []
+    for code_names, frames in groups:
+        for code_name in code_names:
+            palette = np.array(sprite_palette_rgba(COLOR_CODE_LOOKUP[code_name]), dtype=np.uint8)
+            for label, (index, entry) in frames.items():
+                name = f"{ACTOR_OUTPUT_DIR.name}/sprite_{index:02d}_{code_name}.png"
+                if name not in written:
+                    rgba = palette[sheet[index]]
+                    if SCALE_FACTOR > 1:
+                        rgba = rgba.repeat(SCALE_FACTOR, axis=0).repeat(SCALE_FACTOR, axis=1)
+                    height, width, _ = rgba.shape
+                    image = Image.frombuffer("RGBA", (width, height), np.ascontiguousarray(rgba), "raw", "RGBA", 0, 1)
+                    writer.write_png(writer.root / name, image)
+                    written.add(name)
+                lines += ["--", f"name : {code_name}_{label}" if label else f"name : {code_name}", f"filename : {name}"]
+                lines += [f"{key} : {entry[key]}" for key in ("x", "y") if key in entry]
+
+    writer.write(output_list, ("\n".join(lines) + "\n").encode("utf-8"))
+    return len(written)
 
-        for slot_value in used_slots:
-            suffix = slot_suffix(slot_value)
-            mask = pixels_to_slot_mask(tile_pixels, slot_value, scale=SCALE_FACTOR)
-            mask_filename = TILE_OUTPUT_DIR / f"tile_{tile_idx:02X}_{suffix}.png"
-            mask.save(mask_filename)
-            exported_layers += 1
-    return exported_layers
 
+# ---------------------------------------------------------------------------
+# 6) Incremental build cache
+# ---------------------------------------------------------------------------
 
-def main() -> None:
-    global rom_sprites, rom_tiles
-    rom_sprites = load_rom_file(ROM_SPRITES_PATH, ROM_SPRITES_SIZE)
-    rom_tiles = load_rom_file(ROM_TILES_PATH, ROM_TILES_SIZE)
-    ensure_rom_lengths()
+def script_sources() -> List[Path]:
+    """Every module in this directory; like the deploy cache key, outputs are keyed on all of them."""
+    return sorted(CURRENT_DIR.glob("*.py"))
 
-    sprite_layers_written = export_sprites()
-    print(f"Sprite export complete: generated {sprite_layers_written} layer PNG files at {SPRITE_OUTPUT_DIR.resolve()}")
 
-    tile_usage = simulate_tile_usage()
-    tile_layers_written = export_tiles(tile_usage)
-    print(f"Tile export complete: generated {tile_layers_written} layer PNG files at {TILE_OUTPUT_DIR.resolve()}")
+def build_cache_key(rom: RomSet, settings: Dict[str, object]) -> str:
+    """
+    Hash everything the exported files depend on: both ROMs, the color PROM and
+    palette tables, the scripts (this one holds the tile usage and layout tables,
+    the others are imported helpers) and the export settings.
+    """
+    parts = [
+        rom.rom_sprites,
+        rom.rom_tiles,
+        bytes(rom_hwcolors),
+        bytes(rom_palette),
+        *(path.name.encode("utf-8") + b"\0" + path.read_bytes() for path in script_sources()),
+        json.dumps(settings, sort_keys=True).encode("utf-8"),
+    ]
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, object]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def manifest_is_fresh(manifest: Dict[str, object], key: str, root: Path) -> bool:
+    """True when manifest was produced for key and every recorded output is still on disk unchanged."""
+    outputs = manifest.get("outputs")
+    if manifest.get("key") != key or not isinstance(outputs, dict):
+        return False
+    for name, digest in outputs.items():
+        try:
+            data = (root / name).read_bytes()
+        except FileNotFoundError:
+            return False
+        if hashlib.sha256(data).hexdigest() != digest:
+            return False
+    return True
+
+
+def save_manifest(
+    path: Path,
+    previous: Dict[str, object],
+    key: str,
+    outputs: Dict[str, str],
+    root: Path,
+) -> int:
+    """Record key and outputs, deleting files the previous run produced but this one did not."""
+    removed = 0
+    old_outputs = previous.get("outputs")
+    if isinstance(old_outputs, dict):
+        for name in old_outputs.keys() - outputs.keys():
+            stale = root / name
+            if stale.exists():
+                stale.unlink()
+                removed += 1
+    path.parent.mkdir(exist_ok=True, parents=True)
+    manifest = {"key": key, "outputs": dict(sorted(outputs.items()))}
+    path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return removed
+
+
+class ExportOptions(NamedTuple):
+    """Export settings of one export_rom_set() call; main() fills them from the command line."""
+
+    mask_mode: str = MASK_MODE
+    dedupe: bool = False
+    tile_usage: str = "config"
+    atlas: bool = False
+    atlas_max_size: int = ATLAS_MAX_SIZE
+    force: bool = False
+    png_profile: str = PNG_PROFILE
+    strips: bool = False
+    actors: bool = False
+
+
+def export_rom_set(
+    rom: RomSet,
+    output_root: Path = ASSET_DIR,
+    manifest_path: Path = MANIFEST_PATH,
+    options: ExportOptions = ExportOptions(),
+    pool: Optional[Executor] = None,
+) -> Optional[OutputWriter]:
+    """
+    Export the layers (and optional atlas) of rom below output_root. Returns the
+    writer with its digests and counts, or None when the manifest was up to date.
+    """
+    settings: Dict[str, object] = {
+        "scale": SCALE_FACTOR,
+        "skip_transparent": SKIP_FULLY_TRANSPARENT,
+        "png_profile": PNG_PROFILES[options.png_profile]._asdict(),
+        "mask_mode": options.mask_mode,
+        "dedupe": options.dedupe,
+        "tile_usage": options.tile_usage,
+        "config": hashlib.sha256(CONFIG_PATH.read_bytes()).hexdigest(),
+        "sprite_list": hashlib.sha256(SPRITE_LIST_PATH.read_bytes()).hexdigest(),
+        "atlas": options.atlas,
+        "strips": options.strips,
+        "actors": options.actors,
+    }
+    if options.strips or options.actors:
+        settings["profiles"] = hashlib.sha256(PROFILES_PATH.read_bytes()).hexdigest()
+    if options.atlas:
+        settings["atlas_max_size"] = options.atlas_max_size
+        settings["atlas_padding"] = ATLAS_PADDING
+    with metrics.stage("cache_check"):
+        cache_key = build_cache_key(rom, settings)
+        manifest = load_manifest(manifest_path)
+        fresh = not options.force and manifest_is_fresh(manifest, cache_key, output_root)
+    if fresh:
+        print(f"Assets are up to date ({len(manifest['outputs'])} files match {manifest_path.name}), nothing to do")
+        return None
+
+    writer = OutputWriter(output_root, options.png_profile)
+    collected: Optional[Dict[str, Image.Image]] = {} if options.atlas else None
+    # aliased files can only be left out once main.lua loads a list that redirects them
+    aliases = LayerAliases(runtime_sprite_list(CONFIG_PATH) == SPRITE_LIST_PATH) if options.dedupe else None
+
+    with metrics.stage("sprites"):
+        sprite_layers_written = export_sprites(rom, writer, collected, pool, options.mask_mode, aliases)
+    sprite_dir = (output_root / SPRITE_OUTPUT_DIR.name).resolve()
+    print(f"Sprite export complete: generated {sprite_layers_written} layer PNG files at {sprite_dir}")
+
+    with metrics.stage("tile_usage"):
+        layout = load_map_layout(CONFIG_PATH)
+        if options.tile_usage == "simulate":
+            tile_slots: Dict[int, Optional[Set[int]]] = {tile: None for tile in simulate_tile_usage(layout)}
+        else:
+            tile_slots = config_tile_plan(layout, SPRITE_LIST_PATH)
+    with metrics.stage("tiles"):
+        tile_layers_written = export_tiles(rom, tile_slots, writer, collected, pool, options.mask_mode, aliases)
+    tile_dir = (output_root / TILE_OUTPUT_DIR.name).resolve()
+    print(f"Tile export complete: generated {tile_layers_written} layer PNG files at {tile_dir}")
+
+    with metrics.stage("background"):
+        background = export_background(rom, writer, layout, collected)
+    print(f"Background export complete: baked the static maze into {background.resolve()}")
+
+    if aliases is not None:
+        with metrics.stage("dedupe"):
+            aliases.write(writer, output_root / ALIAS_TABLE_PATH.name)
+        print(f"Dedupe complete: {len(aliases.aliases)} duplicate layers aliased in {ALIAS_TABLE_PATH.name}")
+        if aliases.keep_files:
+            print(
+                f"Dedupe: {CONFIG_PATH.name} has main.lua load {SPRITE_LIST_PATH.name}, so the aliased layers "
+                f"were written too; set assets.sprites to the deduplicated list to drop them"
+            )
+        if collected is None:
+            dedup_list = output_root / DEDUP_LIST_PATH.name
+            table = aliases.aliases
+            with metrics.stage("dedupe"):
+                writer.write(
+                    dedup_list,
+                    rewrite_sprite_list(SPRITE_LIST_PATH, lambda name: (table[name], None) if name in table else None),
+                )
+            print(f"Wrote {dedup_list.resolve()} with aliased entries pointing at their canonical layers")
+
+    if collected is not None:
+        atlas_list = output_root / ATLAS_LIST_PATH.name
+        with metrics.stage("atlas"):
+            sheets = export_atlas(
+                collected,
+                writer,
+                SPRITE_LIST_PATH,
+                atlas_list,
+                max_size=options.atlas_max_size,
+                aliases=aliases.aliases if aliases is not None else None,
+            )
+        print(f"Atlas export complete: packed {len(collected)} layers into {sheets} sheet(s), wrote {atlas_list.resolve()}")
+
+    if options.strips:
+        strip_list = output_root / STRIP_LIST_PATH.name
+        with metrics.stage("strips"):
+            strips = export_strips(rom, writer, SPRITE_LIST_PATH, PROFILES_PATH, strip_list, options.mask_mode)
+        print(f"Strip export complete: wrote {strips} animation strip(s) and {strip_list.resolve()}")
+
+    if options.actors:
+        actor_list = output_root / ACTOR_LIST_PATH.name
+        with metrics.stage("actors"):
+            actors = export_actors(rom, writer, SPRITE_LIST_PATH, PROFILES_PATH, actor_list)
+        print(f"Actor export complete: wrote {actors} colored actor sprite(s) and {actor_list.resolve()}")
+
+    with metrics.stage("manifest"):
+        removed = save_manifest(manifest_path, manifest, cache_key, writer.digests, output_root)
+    print(f"Build cache: {writer.written} files written, {writer.unchanged} unchanged, {removed} stale removed")
+    return writer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export Pac-Man sprite and tile layers from the ROM dumps.")
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help=f"Also pack all layers into atlas sheets and write {ATLAS_LIST_PATH.name}.",
+    )
+    parser.add_argument(
+        "--atlas-max-size",
+        type=int,
+        default=ATLAS_MAX_SIZE,
+        help="Largest atlas sheet edge in pixels, a power of two (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--strips",
+        action="store_true",
+        help=f"Also write one sprite strip per animation direction of {PROFILES_PATH.name} "
+        f"and their anim8 grids in {STRIP_LIST_PATH.name}.",
+    )
+    parser.add_argument(
+        "--actors",
+        action="store_true",
+        help=f"Also write every actor sprite of {PROFILES_PATH.name} fully colored under each of its "
+        f"color codes, listed in {ACTOR_LIST_PATH.name}.",
+    )
+    parser.add_argument(
+        "--mask-mode",
+        choices=sorted(MASK_CHANNELS),
+        default=MASK_MODE,
+        help="Image mode of the layer masks: white RGBA or single-channel L/LA alpha (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--png-profile",
+        choices=list(PNG_PROFILES),
+        default=PNG_PROFILE,
+        help="PNG encoding: fast (full-depth images, zlib level 6), compact (1-bit/palette images, level 9) "
+        "or smallest (compact plus the encoder's optimize pass) (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=f"Record pixel-identical layers in {ALIAS_TABLE_PATH.name} and, without --atlas, write "
+        f"{DEDUP_LIST_PATH.name}; the aliased files are only left out once assets.sprites in "
+        f"{CONFIG_PATH.name} names that list.",
+    )
+    parser.add_argument(
+        "--tile-usage",
+        choices=("config", "simulate"),
+        default="config",
+        help="Which tiles to export: what the game draws from config.dl, the text glyphs and sprites.dl "
+        "(config), or everything the original arcade screens show (simulate) (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for mask building and PNG encoding; 0 uses every CPU (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the build manifest and re-export everything.",
+    )
+    parser.add_argument(
+        "--rom-dir",
+        type=Path,
+        help="Export every ROM variant found in this directory one at a time: each subdirectory holding "
+        f"{ROM_SPRITES_PATH.name} and {ROM_TILES_PATH.name} is a variant named after it, and dumps "
+        f"directly in the directory form the variant {ROOT_ROM_SET_NAME!r}.",
+    )
+    parser.add_argument(
+        "--variants-output",
+        type=Path,
+        default=VARIANT_OUTPUT_DIR,
+        help="With --rom-dir, write each variant to <dir>/<variant name> (default: %(default)s).",
+    )
+    pipeline_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    if args.atlas_max_size != _next_pow2(args.atlas_max_size):
+        raise SystemExit("--atlas-max-size must be a power of two.")
+
+    check_sprite_entry(SPRITE_LIST_PATH, BACKGROUND_SPRITE_ENTRY)
+    runtime_list = runtime_sprite_list(CONFIG_PATH)
+    produced = {SPRITE_LIST_PATH: True, ATLAS_LIST_PATH: args.atlas, DEDUP_LIST_PATH: args.dedupe and not args.atlas}
+    if not produced.get(runtime_list, True):
+        raise SystemExit(
+            f"{CONFIG_PATH.name} has main.lua load {runtime_list.name}, which this run would not write; "
+            f"pass {'--atlas' if runtime_list == ATLAS_LIST_PATH else '--dedupe without --atlas'}."
+        )
+
+    options = ExportOptions(
+        mask_mode=args.mask_mode,
+        dedupe=args.dedupe,
+        tile_usage=args.tile_usage,
+        atlas=args.atlas,
+        atlas_max_size=args.atlas_max_size,
+        force=args.force,
+        png_profile=args.png_profile,
+        strips=args.strips,
+        actors=args.actors,
+    )
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with ExitStack() as stack:
+        stack.enter_context(pipeline_metrics.instrumented(args))
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs)) if jobs > 1 else None
+
+        if args.rom_dir is None:
+            with metrics.stage("rom_load"):
+                rom = RomSet.load(ROM_SPRITES_PATH, ROM_TILES_PATH)
+            export_rom_set(rom, ASSET_DIR, MANIFEST_PATH, options, pool)
+            return
+
+        try:
+            rom_sets = find_rom_sets(args.rom_dir)
+        except ValueError as exc:
+            raise SystemExit(str(exc)) from None
+        if not rom_sets:
+            raise SystemExit(f"No ROM sets found in {args.rom_dir}.")
+        for name, sprites_path, tiles_path in rom_sets:
+            print(f"ROM set {name}:")
+            manifest_path = MANIFEST_PATH.with_name(f"{MANIFEST_PATH.stem}_{name}.json")
+            with metrics.stage("rom_load"):
+                rom = RomSet.load(sprites_path, tiles_path)
+            export_rom_set(rom, args.variants_output / name, manifest_path, options, pool)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""
+Stage timings, counters and optional cProfile wrapping shared by gen_sprites.py and gen_fonts.py.
+
+Both scripts record into the module-level `metrics` object as they run; add_arguments()
+adds the --timings / --timings-json / --profile / --profile-top flags, and instrumented()
+turns those flags into a printed summary, a JSON report and a hot-function table.
+CPU times are those of the calling process, so work done in --jobs workers only shows
+up as wall time.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+REPORT_VERSION = 1
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+class Metrics:
+    """Accumulated wall/CPU time per stage, named counters and per-item details (e.g. glyph contours)."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.items: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block; repeated stages with the same name add up."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_stage(self, name: str, wall: float, cpu: float) -> None:
+        """Add one timed run of name, e.g. measured in a worker process."""
+        entry = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+        entry["wall"] += wall
+        entry["cpu"] += cpu
+        entry["calls"] += 1
+
+    def reset(self) -> None:
+        """Forget everything recorded so far, e.g. in a worker process that runs several jobs."""
+        self.stages.clear()
+        self.counters.clear()
+        self.items.clear()
+
+    def merge(self, report: Dict[str, object]) -> None:
+        """Add a report() taken elsewhere, e.g. in a worker process, to this one."""
+        for name, values in report["stages"].items():  # type: ignore[union-attr]
+            entry = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            for key in entry:
+                entry[key] += values[key]
+        for name, value in report["counters"].items():  # type: ignore[union-attr]
+            self.counters[name] += value
+        for section, entries in report["items"].items():  # type: ignore[union-attr]
+            self.items[section].update(entries)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def record(self, section: str, key: str, **values: int) -> None:
+        """Store per-item values, e.g. record("glyphs", "A", contours=2, points=14)."""
+        self.items[section][key] = values
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "version": REPORT_VERSION,
+            "stages": self.stages,
+            "counters": dict(self.counters),
+            "items": dict(self.items),
+        }
+
+    def summary(self) -> List[str]:
+        lines = [f"{'stage':<24}{'wall ms':>10}{'cpu ms':>10}{'calls':>7}"]
+        for name, entry in self.stages.items():
+            lines.append(f"{name:<24}{entry['wall'] * 1000:>10.2f}{entry['cpu'] * 1000:>10.2f}{entry['calls']:>7}")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        for section, entries in self.items.items():
+            totals: Dict[str, int] = defaultdict(int)
+            for values in entries.values():
+                for key, value in values.items():
+                    totals[key] += value
+            detail = ", ".join(f"{value} {key}" for key, value in totals.items())
+            lines.append(f"{section}: {len(entries)} ({detail})" if detail else f"{section}: {len(entries)}")
+        return lines
+
+
+metrics = Metrics()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print wall/CPU time per stage and the file, byte and item counters at the end.",
+    )
+    parser.add_argument(
+        "--timings-json",
+        type=Path,
+        help="Write the timings and counters as a JSON report to this path.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Run under cProfile and print the hottest functions; with PATH also dump the raw stats there.",
+    )
+    parser.add_argument(
+        "--profile-sort",
+        choices=PROFILE_SORT_KEYS,
+        default="cumulative",
+        help="Sort key of the --profile summary (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        help="Number of functions in the --profile summary (default: %(default)d).",
+    )
+
+
+@contextmanager
+def instrumented(args: argparse.Namespace, emit: Callable[[str], None] = print) -> Iterator[Metrics]:
+    """Run the enclosed block under the requested instrumentation and emit the reports afterwards."""
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if args.profile is not None else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with metrics.stage("total"):
+            yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            if args.profile:
+                profiler.dump_stats(args.profile)
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(args.profile_sort).print_stats(args.profile_top)
+            emit(stream.getvalue().rstrip())
+        if args.timings:
+            emit("\n".join(metrics.summary()))
+        if args.timings_json:
+            args.timings_json.parent.mkdir(parents=True, exist_ok=True)
+            args.timings_json.write_text(json.dumps(metrics.report(), indent=2) + "\n", encoding="utf-8")
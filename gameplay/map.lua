@@ -19,6 +19,11 @@ end)
 local sprite_overrieds <const> = {
     ["."] = "tile_10",
 }
+-- tiles that change during a round and therefore can't be part of the baked background
+local dynamic_tiles <const> = {
+    ["."] = true,
+    P = true,
+}
 ---@type integer
 local default_color
 ---@type table
@@ -30,6 +35,8 @@ local map_rows
 
 ---@type table
 local TILES
+---@type integer?
+local background
 
 function CMD.init(map, world)
     map.tiles = {}
@@ -37,6 +44,15 @@ function CMD.init(map, world)
     local sprites = world.resources.sprites
     local config = world.config
 
+    if background then
+        -- the baked image shares the tiles' anchor, so center it between the first and last tile
+        map.background = {
+            sprite = background,
+            x = (config.map_cols - 1) * config.tile // 2,
+            y = map_offset_y * config.tile + (map_rows - 1) * config.tile // 2,
+        }
+    end
+
     for y = 1, config.display_tile_y do
         for x = 1, config.display_tile_x do
             local sprite
@@ -45,7 +61,7 @@ function CMD.init(map, world)
                 local i = y - map_offset_y
                 local line = assert(TILES[i])
                 local c = line:sub(x, x)
-                if c ~= "" then
+                if c ~= "" and (dynamic_tiles[c] or not background) then
                     local sprite_id = sprite_overrieds[c] or ("tile_" .. c)
                     base_sprite = sprites[sprite_id]
                     if base_sprite then
@@ -75,7 +91,7 @@ function CMD.reset(map, world)
                 local i = y - map_offset_y
                 local line = assert(TILES[i])
                 local c = line:sub(x, x)
-                if c ~= "" then
+                if c ~= "" and (dynamic_tiles[c] or not background) then
                     local sprite_id = sprite_overrieds[c] or ("tile_" .. c)
                     local base_sprite = sprites[sprite_id]
                     if base_sprite then
@@ -132,6 +148,7 @@ local function init(_, world)
     local config = world.config
     local resources = world.resources
     TILES = resources.tiles
+    background = resources.sprites.maze_background
     map_offset_y = config.map_offset_y
     map_rows = config.map_rows
 
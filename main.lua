@@ -38,7 +38,7 @@ do
         setmetatable(world, mt)
         world.resources = setmetatable({
             batch = args.batch,
-            sprites = soluna.load_sprites "assets/sprites.dl",
+            sprites = soluna.load_sprites(cfg.assets.sprites),
             tiles = cfg.map.tiles,
         }, mt)
 
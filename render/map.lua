@@ -53,6 +53,11 @@ end
 local function process(system, e)
     local batch = system.world.resources.batch
 
+    local background = e.map.background
+    if background then
+        batch:add(background.sprite, background.x, background.y)
+    end
+
     for _, tile in ipairs(e.map.tiles) do
         if tile.sprite then
             batch:add(tile.sprite, tile.x, tile.y)